@@ -1,39 +1,98 @@
-import spacy
+import argparse
+import csv
 import re
-import pandas as pd
-from bs4 import BeautifulSoup
+from pathlib import Path
 from collections import Counter
 
-# Load NLP model
-nlp = spacy.load("en_core_web_sm")
+import instrumentation
+import nlp_models
+
+# pandas and BeautifulSoup are imported by the functions that use them, so importing this module stays fast
+
+# Only entities and POS tags are counted; the parser and lemmatizer are never loaded
+UNUSED_COMPONENTS = ("parser", "lemmatizer")
+
+
+def get_nlp():
+    """The shared pipeline for this module, loaded on first use."""
+
+    return nlp_models.get_nlp(exclude=UNUSED_COMPONENTS)
 
 # -------------------------
 # Text Cleaning Function
 # -------------------------
 
+# Plain text without these is returned unchanged by the HTML parser, apart from
+# leading whitespace; anything else still goes through BeautifulSoup
+HTML_MARKERS = ("<", "&", "\x00", "\r")
+
+URL_PATTERN = re.compile(r"http\S+")
+HEADING_PATTERN = re.compile(r"==.*?==+")
+PUNCTUATION_TABLE = str.maketrans("", "", ",'\"*=:()|")
+
+
+def strip_markup(raw_text):
+
+    if raw_text.startswith("\ufeff") or any(marker in raw_text for marker in HTML_MARKERS):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(raw_text, "lxml").text
+
+    return raw_text.lstrip(" \t\n\x0c")
+
+
+def strip_templates(text):
+    r"""
+    Same result as re.sub(r"\{.*\}", "", text) in linear time: on every line, the
+    greedy pattern removes everything from the first '{' to the last '}'.
+    """
+
+    parts = []
+    pos = 0
+    start = text.find("{")
+
+    while start != -1:
+        line_end = text.find("\n", start)
+        if line_end == -1:
+            line_end = len(text)
+        end = text.rfind("}", start, line_end)
+        if end != -1:
+            parts.append(text[pos:start])
+            pos = end + 1
+        start = text.find("{", line_end)
+
+    if not parts:
+        return text
+
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
 def clean_text(raw_text):
 
-    text = BeautifulSoup(raw_text, "lxml").text
+    text = strip_markup(raw_text)
 
-    text = text.replace("\n\n", "")
-    text = text.replace("[", "").replace("]", "")
+    text = text.replace("\n\n", "").replace("[", "").replace("]", "")
 
-    text = re.sub(r"http\S+", "", text)
-    text = re.sub(r"==.*?==+", "", text)
-    text = re.sub(r"\{.*\}", "", text)
-    text = re.sub(r"[\,\'\"\*\=:\(\)|]", "", text)
+    text = URL_PATTERN.sub("", text)
+    text = HEADING_PATTERN.sub("", text)
+    text = strip_templates(text)
 
-    return text
+    return text.translate(PUNCTUATION_TABLE)
 
 # -------------------------
 # Named Entity Extraction
 # -------------------------
 
+def count_named_entities(doc):
+
+    return Counter(ent.text for ent in doc.ents)
+
+
 def extract_named_entities(doc, title):
 
-    entities = [ent.text for ent in doc.ents]
+    import pandas as pd
 
-    freq = Counter(entities)
+    freq = count_named_entities(doc)
 
     entity_data = [(title, entity, count)
                    for entity, count in freq.items()]
@@ -49,17 +108,22 @@ def extract_named_entities(doc, title):
 # POS Extraction
 # -------------------------
 
-def extract_pos_frequency(doc, title):
+def count_pos_words(doc):
 
-    pos_words = [
+    return Counter(
         token.text
         for token in doc
         if not token.is_stop
         and not token.is_punct
         and token.pos_ in ["VERB", "ADJ"]
-    ]
+    )
+
 
-    freq = Counter(pos_words)
+def extract_pos_frequency(doc, title):
+
+    import pandas as pd
+
+    freq = count_pos_words(doc)
 
     pos_data = [(title, word, count)
                 for word, count in freq.items()]
@@ -72,32 +136,231 @@ def extract_pos_frequency(doc, title):
     return df
 
 # -------------------------
-# Main Execution
+# Corpus Processing
+# -------------------------
+
+def read_article(filename):
+    """Returns (title, raw text) of a dump file whose first line is the title."""
+
+    with open(filename, "r", encoding="utf8") as file:
+
+        title = file.readline().strip()
+
+        raw_text = file.read()
+
+    return title, raw_text
+
+
+def iter_articles(dump_dir):
+    """Yields (cleaned text, title) for every .txt file in dump_dir, in file name order."""
+
+    for path in sorted(Path(dump_dir).glob("*.txt")):
+
+        with instrumentation.timer("ner_pos.read"):
+            title, raw_text = read_article(path)
+
+        with instrumentation.timer("ner_pos.clean"):
+            text = clean_text(raw_text)
+
+        instrumentation.count("ner_pos.articles")
+
+        yield text, title
+
+# -------------------------
+# Chunked Processing
 # -------------------------
 
-filename = "./wikipedia_dump/1.txt"
+SENTENCE_END = re.compile(r"[.!?][ \t]")
+
+
+def iter_chunks(text, max_chars):
+    """
+    Splits text into chunks of at most max_chars characters.
+    A chunk ends at the last line break in its window, else at the last sentence end,
+    else at the last space; words are only cut if a window has no space at all.
+    """
+
+    pos = 0
+
+    while len(text) - pos > max_chars:
+
+        limit = pos + max_chars
+        cut = text.rfind("\n", pos, limit)
+
+        if cut <= pos:
+            ends = [match.start() + 1 for match in SENTENCE_END.finditer(text, pos, limit)]
+            cut = ends[-1] if ends else text.rfind(" ", pos, limit)
 
-with open(filename, "r", encoding="utf8") as file:
+        cut = cut + 1 if cut > pos else limit
 
-    title = file.readline().strip()
+        yield text[pos:cut]
 
-    raw_text = file.read()
+        pos = cut
 
-cleaned_text = clean_text(raw_text)
+    if pos < len(text):
+        yield text[pos:]
 
-doc = nlp(cleaned_text)
 
-entity_df = extract_named_entities(doc, title)
+def count_chunked(text, chunk_chars=100000, batch_size=8):
+    """
+    Counts named entities and POS words of text chunk by chunk through nlp.pipe, so only
+    batch_size chunk Docs are alive at a time. Returns (entity Counter, POS word Counter).
+    """
 
-pos_df = extract_pos_frequency(doc, title)
+    entities = Counter()
+    pos_words = Counter()
 
-# Save results
-entity_df.to_csv(f"{title}.csv", index=False)
+    docs = get_nlp().pipe(iter_chunks(text, chunk_chars), batch_size=batch_size)
 
-pos_df.to_csv("pos_frequency.csv", index=False)
+    for doc in instrumentation.timed_iter("ner_pos.parse", docs):
+
+        with instrumentation.timer("ner_pos.count"):
+            entities.update(count_named_entities(doc))
+            pos_words.update(count_pos_words(doc))
+
+    return entities, pos_words
+
+
+def iter_article_chunks(dump_dir, chunk_chars=None):
+    """
+    Yields (chunk, (article index, title)) for every chunk of every article of dump_dir;
+    without chunk_chars every article is a single chunk.
+    """
+
+    for i, (text, title) in enumerate(iter_articles(dump_dir)):
+
+        chunks = iter_chunks(text, chunk_chars) if chunk_chars else [text]
+
+        for chunk in chunks:
+
+            yield chunk, (i, title)
+
+
+def process_dump(dump_dir, output_dir=".", n_process=1, batch_size=8, chunk_chars=None):
+    """
+    Streams every article of dump_dir through nlp.pipe and writes, in one pass,
+    named_entities.csv and pos_frequency.csv (per-title rows) plus the corpus-wide
+    totals in named_entity_totals.csv and pos_totals.csv.
+    With chunk_chars, articles are split by iter_chunks and counted chunk by chunk,
+    so memory is bounded by the chunk size rather than the longest article.
+    Returns the merged (entity Counter, POS word Counter).
+    """
+
+    import pandas as pd
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    entity_totals = Counter()
+    pos_totals = Counter()
+
+    with open(output_dir / "named_entities.csv", "w", encoding="utf8", newline="") as ent_file, \
+         open(output_dir / "pos_frequency.csv", "w", encoding="utf8", newline="") as pos_file:
+
+        ent_writer = csv.writer(ent_file)
+        ent_writer.writerow(["Title", "Named Entity", "Frequency"])
+        pos_writer = csv.writer(pos_file)
+        pos_writer.writerow(["Title", "Word", "Frequency"])
+
+        def write_article(title, entities, pos_words):
+
+            with instrumentation.timer("ner_pos.write"):
+                ent_writer.writerows((title, entity, count) for entity, count in entities.items())
+                pos_writer.writerows((title, word, count) for word, count in pos_words.items())
+
+            entity_totals.update(entities)
+            pos_totals.update(pos_words)
+
+        docs = get_nlp().pipe(iter_article_chunks(dump_dir, chunk_chars), as_tuples=True,
+                               n_process=n_process, batch_size=batch_size)
+
+        # Chunks of one article arrive consecutively; counts are flushed when the next article starts
+        current, entities, pos_words = None, Counter(), Counter()
+
+        # ner_pos.parse includes ner_pos.read and ner_pos.clean, which run as nlp.pipe pulls its input
+        for doc, key in instrumentation.timed_iter("ner_pos.parse", docs):
+
+            if key != current and current is not None:
+                write_article(current[1], entities, pos_words)
+                entities, pos_words = Counter(), Counter()
+
+            current = key
+            instrumentation.count("ner_pos.chunks")
+            with instrumentation.timer("ner_pos.count"):
+                entities.update(count_named_entities(doc))
+                pos_words.update(count_pos_words(doc))
+
+        if current is not None:
+            write_article(current[1], entities, pos_words)
+
+    pd.DataFrame(entity_totals.most_common(), columns=["Named Entity", "Frequency"]) \
+        .to_csv(output_dir / "named_entity_totals.csv", index=False)
+    pd.DataFrame(pos_totals.most_common(), columns=["Word", "Frequency"]) \
+        .to_csv(output_dir / "pos_totals.csv", index=False)
+
+    return entity_totals, pos_totals
+
+# -------------------------
+# Single File Execution
+# -------------------------
+
+def process_file(filename="./wikipedia_dump/1.txt", chunk_chars=None):
+
+    import pandas as pd
+
+    title, raw_text = read_article(filename)
+
+    cleaned_text = clean_text(raw_text)
+
+    if chunk_chars and len(cleaned_text) > chunk_chars:
+
+        entities, pos_words = count_chunked(cleaned_text, chunk_chars)
+
+        entity_df = pd.DataFrame([(title, entity, count) for entity, count in entities.items()],
+                                 columns=["Title", "Named Entity", "Frequency"])
+
+        pos_df = pd.DataFrame([(title, word, count) for word, count in pos_words.items()],
+                              columns=["Title", "Word", "Frequency"])
+
+    else:
+
+        doc = get_nlp()(cleaned_text)
+
+        entity_df = extract_named_entities(doc, title)
+
+        pos_df = extract_pos_frequency(doc, title)
+
+    # Save results
+    entity_df.to_csv(f"{title}.csv", index=False)
+
+    pos_df.to_csv("pos_frequency.csv", index=False)
+
+    print("Named entities extracted:", len(entity_df))
+    print("POS frequency extracted:", len(pos_df))
+
+# -------------------------
+# Main Execution
+# -------------------------
 
-print("Named entities extracted:", len(entity_df))
-print("POS frequency extracted:", len(pos_df))
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Named entity and POS frequencies of a Wikipedia dump")
+    parser.add_argument("--dump_dir", default="./wikipedia_dump", help="Directory of .txt articles")
+    parser.add_argument("--file", default=None, help="Process a single article the old way instead")
+    parser.add_argument("--output_dir", default=".", help="Directory for the consolidated CSVs")
+    parser.add_argument("--n_process", type=int, default=1, help="spaCy worker processes")
+    parser.add_argument("--batch_size", type=int, default=8, help="Articles (or chunks) per nlp.pipe batch")
+    parser.add_argument("--chunk_chars", type=int, default=None,
+                        help="Process articles in chunks of at most this many characters")
+    args = parser.parse_args()
+
+    if args.file:
+        process_file(args.file, args.chunk_chars)
+    else:
+        entity_totals, pos_totals = process_dump(args.dump_dir, args.output_dir, args.n_process,
+                                                 args.batch_size, args.chunk_chars)
+        print("Distinct named entities:", len(entity_totals))
+        print("Distinct POS words:", len(pos_totals))
 
 #References used to solve the problems:
 #https://realpython.com/natural-language-processing-spacy-python/
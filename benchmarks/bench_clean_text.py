@@ -0,0 +1,85 @@
+"""
+Benchmark: MB/sec of NER_POS_Tagging.clean_text vs. the previous BeautifulSoup + re.sub
+cleaner, on the articles of a Wikipedia dump directory. Every article's output is also
+checked against the previous cleaner (golden output).
+
+Usage: python benchmarks/bench_clean_text.py [dump_dir]
+Without a dump directory, synthetic wikitext articles are used.
+"""
+import os
+import random
+import re
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup, MarkupResemblesLocatorWarning
+
+from NER_POS_Tagging import clean_text, read_article
+
+warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
+
+
+def previous_clean_text(raw_text):
+    """The cleaner clean_text replaced, kept as the golden reference."""
+    text = BeautifulSoup(raw_text, "lxml").text
+    text = text.replace("\n\n", "")
+    text = text.replace("[", "").replace("]", "")
+    text = re.sub(r"http\S+", "", text)
+    text = re.sub(r"==.*?==+", "", text)
+    text = re.sub(r"\{.*\}", "", text)
+    text = re.sub(r"[\,\'\"\*\=:\(\)|]", "", text)
+    return text
+
+
+def synthetic_articles(count=20, seed=0):
+    rng = random.Random(seed)
+    words = ["river", "city", "Paris", "born", "(1901)", "said,", "'quoted'", "[[Link|label]]", "*", "|"]
+    articles = []
+    for i in range(count):
+        lines = []
+        for _ in range(400):
+            kind = rng.random()
+            if kind < 0.1:
+                lines.append(f"== Section {rng.randrange(99)} ==")
+            elif kind < 0.2:
+                lines.append("{{Infobox " + " | ".join(f"key{j} = value{j}" for j in range(rng.randrange(30))) + "}}")
+            elif kind < 0.25:
+                lines.append(f"See http://example.org/page/{rng.randrange(10 ** 6)} for details.")
+            else:
+                lines.append(" ".join(rng.choice(words) for _ in range(rng.randrange(5, 40))))
+            lines.append("\n" if rng.random() < 0.3 else "")
+        articles.append((f"Article {i}", "\n".join(lines)))
+    return articles
+
+
+def main():
+    if len(sys.argv) > 1:
+        articles = [read_article(path) for path in sorted(Path(sys.argv[1]).glob("*.txt"))]
+    else:
+        articles = synthetic_articles()
+    total_mb = sum(len(raw.encode("utf8")) for _, raw in articles) / 2 ** 20
+
+    start = time.perf_counter()
+    golden = [previous_clean_text(raw) for _, raw in articles]
+    previous_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleaned = [clean_text(raw) for _, raw in articles]
+    new_time = time.perf_counter() - start
+
+    mismatches = [title for (title, _), a, b in zip(articles, golden, cleaned) if a != b]
+    print(f"{len(articles)} articles, {total_mb:.1f} MB")
+    print(f"previous:   {total_mb / previous_time:.1f} MB/sec")
+    print(f"clean_text: {total_mb / new_time:.1f} MB/sec")
+    print(f"golden output: {len(articles) - len(mismatches)}/{len(articles)} identical")
+    if mismatches:
+        print("differs for:", ", ".join(mismatches[:10]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
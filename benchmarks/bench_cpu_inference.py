@@ -0,0 +1,68 @@
+"""
+Benchmark: fp32 vs. the CPU fast path (dynamic int8 quantization, length-bucketed batches).
+Reports latency per prompt and top-1 agreement of both paths on the same relation CSVs.
+
+Usage: python benchmarks/bench_cpu_inference.py [input_dir] [model_type] [batch_size] [num_threads]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd
+import torch
+
+from prompt_generation import RELATIONS, configure_cpu_threads, create_prompt, initialize_lm, length_order
+
+
+def top1(nlp_pipeline, prompts, batch_size, bucket_by_length):
+    """Returns (top-1 token per prompt, seconds)."""
+    order = length_order(nlp_pipeline.tokenizer, prompts) if bucket_by_length else range(len(prompts))
+    predictions = [None] * len(prompts)
+    start = time.perf_counter()
+    with torch.inference_mode():
+        outputs = nlp_pipeline((prompts[i] for i in order), batch_size=batch_size, top_k=1)
+        for i, out in zip(order, outputs):
+            predictions[i] = out[0]["token_str"]
+    return predictions, time.perf_counter() - start
+
+
+def main():
+    input_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("./dataset/test/")
+    model_type = sys.argv[2] if len(sys.argv) > 2 else "bert-base-uncased"
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    configure_cpu_threads(int(sys.argv[4]) if len(sys.argv) > 4 else None)
+
+    fp32, mask_token = initialize_lm(model_type, 1)
+    int8, _ = initialize_lm(model_type, 1, quantize=True)
+
+    print(f"{model_type}, batch_size={batch_size}, threads={torch.get_num_threads()}")
+    print(f"{'relation':<28}{'prompts':>8}{'fp32 ms':>10}{'int8 ms':>10}{'speedup':>9}{'top-1 agree':>13}")
+    total = {"n": 0, "fp32": 0.0, "int8": 0.0, "agree": 0}
+    for relation in sorted(RELATIONS):
+        entities = pd.read_csv(input_dir / f"{relation}.csv")["SubjectEntity"].drop_duplicates().tolist()
+        prompts = [create_prompt(entity, relation, mask_token) for entity in entities]
+        if not prompts:
+            continue
+        expected, fp32_time = top1(fp32, prompts, batch_size, bucket_by_length=False)
+        predicted, int8_time = top1(int8, prompts, batch_size, bucket_by_length=True)
+        agree = sum(a == b for a, b in zip(expected, predicted))
+
+        n = len(prompts)
+        print(f"{relation:<28}{n:>8}{1000 * fp32_time / n:>10.2f}{1000 * int8_time / n:>10.2f}"
+              f"{fp32_time / int8_time:>8.2f}x{agree / n:>13.1%}")
+        total["n"] += n
+        total["fp32"] += fp32_time
+        total["int8"] += int8_time
+        total["agree"] += agree
+
+    if total["n"]:
+        n = total["n"]
+        print(f"{'total':<28}{n:>8}{1000 * total['fp32'] / n:>10.2f}{1000 * total['int8'] / n:>10.2f}"
+              f"{total['fp32'] / total['int8']:>8.2f}x{total['agree'] / n:>13.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: full-page BeautifulSoup parsing vs. SoupStrainer partial parsing of the
+scraper's target tables. Reports parse time and peak Python memory per page.
+
+Usage: python benchmarks/bench_partial_parsing.py [saved_page.html ...]
+Saved pages whose name contains "course" are parsed as LSF course pages, all others as
+HIMYM character pages. Without arguments, synthetic pages of realistic size are used.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from web_scraping import parse_character_infobox, parse_course_details
+
+REPEAT = 20
+
+
+def synthetic_pages():
+    """A wiki character page and an LSF course page padded with navigation markup."""
+    navigation = "".join(
+        f'<div class="nav"><ul>{"".join(f"<li><a href=/wiki/P{i}_{j}>Page {i} {j}</a></li>" for j in range(20))}</ul></div>'
+        for i in range(150)
+    )
+    infobox = '<table class="infobox character">' + "".join(
+        f"<tr><th>Attribute {i}</th><td>Value {i} <sup>[{i}]</sup></td></tr>" for i in range(25)
+    ) + "</table>"
+    character = f"<html><body>{navigation}<div id=content>{infobox}<p>{'Lorem ipsum. ' * 3000}</p></div>{navigation}</body></html>"
+
+    details = '<table summary="Grunddaten zur Veranstaltung">' + "".join(
+        f"<tr><th>Field {i}</th><td>Some   value {i}</td></tr>" for i in range(15)
+    ) + "</table>"
+    instructors = ('<table summary="Verantwortliche Dozenten"><tr><th class="mod">Responsible Instructors</th></tr>'
+                   '<tr><td class="mod_n_odd">Prof. A</td></tr><tr><td class="mod_n_even">Dr. B</td></tr></table>')
+    schedule = "<table summary=Termine>" + "<tr><td>Mon</td><td>10:00</td><td>Room 1</td></tr>" * 500 + "</table>"
+    course = f"<html><body>{navigation}{details}{schedule}{instructors}</body></html>"
+    return [("character (synthetic)", parse_character_infobox, character),
+            ("course (synthetic)", parse_course_details, course)]
+
+
+def measure(parse, html, partial):
+    """Returns (result, seconds per parse, peak bytes allocated during one parse)."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = parse(html, partial=partial)
+    elapsed = (time.perf_counter() - start) / REPEAT
+
+    tracemalloc.start()
+    parse(html, partial=partial)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    pages = []
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf8") as f:
+            parse = parse_course_details if "course" in os.path.basename(path) else parse_character_infobox
+            pages.append((os.path.basename(path), parse, f.read()))
+    pages = pages or synthetic_pages()
+
+    print(f"{'page':<24}{'KB':>7}{'full ms':>10}{'part ms':>10}{'full MB':>10}{'part MB':>10}  same")
+    for name, parse, html in pages:
+        full, full_time, full_peak = measure(parse, html, partial=False)
+        part, part_time, part_peak = measure(parse, html, partial=True)
+        print(f"{name:<24}{len(html.encode('utf8')) / 1024:>7.0f}{1000 * full_time:>10.2f}{1000 * part_time:>10.2f}"
+              f"{full_peak / 2 ** 20:>10.2f}{part_peak / 2 ** 20:>10.2f}  {full == part}")
+
+
+if __name__ == "__main__":
+    main()
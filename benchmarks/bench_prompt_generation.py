@@ -0,0 +1,43 @@
+"""
+Benchmark: fill-mask throughput (prompts/sec) of the batched probe for several batch sizes.
+
+Usage: python benchmarks/bench_prompt_generation.py [model_type] [num_prompts]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torch
+
+from prompt_generation import RELATIONS, create_prompt, initialize_lm
+
+BATCH_SIZES = [1, 8, 32, 64]
+
+
+def main():
+    model_type = sys.argv[1] if len(sys.argv) > 1 else "bert-base-uncased"
+    num_prompts = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    top_k = 200
+
+    nlp_pipeline, mask_token = initialize_lm(model_type, top_k)
+    relations = sorted(RELATIONS)
+    prompts = [create_prompt(f"Entity {i}", relations[i % len(relations)], mask_token) for i in range(num_prompts)]
+
+    # Warm up once so the first measurement does not pay for lazy initialisation
+    with torch.inference_mode():
+        nlp_pipeline(prompts[:8], batch_size=8, top_k=top_k)
+
+    print(f"{model_type}, {num_prompts} prompts, top_k={top_k}, device={nlp_pipeline.device}")
+    for batch_size in BATCH_SIZES:
+        start = time.perf_counter()
+        with torch.inference_mode():
+            for _ in nlp_pipeline((prompt for prompt in prompts), batch_size=batch_size, top_k=top_k):
+                pass
+        elapsed = time.perf_counter() - start
+        print(f"batch_size={batch_size:>3}: {num_prompts / elapsed:.1f} prompts/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: SPO extraction throughput, per-line nlp() on the full pipeline with a Matcher
+per sentence vs. SPOExtractor (compiled Matcher, batched nlp.pipe on the spo_extraction
+pipeline, which is loaded without NER and the lemmatizer).
+
+Usage: python benchmarks/bench_spo_extraction.py [sentence_file] [num_sentences] [batch_size]
+Without a sentence file, synthetic sentences are generated.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import nlp_models
+from spo_extraction import SPOExtractor, get_full_predicate, get_object, get_nlp, get_predicates, get_subject
+
+SUBJECTS = ["The company", "My brother", "The old river", "A small team", "The committee", "Marie Curie"]
+VERBS = ["was founded in", "works for", "flows through", "looked at", "has moved to", "discovered"]
+OBJECTS = ["the city", "a large bank", "the northern valley", "the proposal", "radium", "the new office"]
+
+
+def make_sentences(num_sentences: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}." for _ in range(num_sentences)]
+
+
+def per_line_extract(sentences):
+    """The previous path: the full pipeline's nlp(line) and a freshly compiled Matcher for every sentence."""
+    nlp = nlp_models.get_nlp()
+    triples = []
+    for line in sentences:
+        doc = nlp(line)
+        predicates = get_predicates(doc)
+        if not predicates:
+            continue
+        full_predicate = get_full_predicate(predicates)
+        noun_chunks = list(doc.noun_chunks)
+        subject = get_subject(full_predicate, noun_chunks)
+        object_ = get_object(full_predicate, noun_chunks)
+        if subject and object_:
+            triples.append((line, (str(subject), str(full_predicate.root), str(object_))))
+    return triples
+
+
+def main():
+    if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+        with open(sys.argv[1], "r", encoding="utf8") as fin:
+            sentences = [line.strip() for line in fin if line.strip()]
+        args = sys.argv[2:]
+    else:
+        args = sys.argv[1:]
+        sentences = None
+    num_sentences = int(args[0]) if args else 5000
+    batch_size = int(args[1]) if len(args) > 1 else 256
+    sentences = (sentences or make_sentences(num_sentences))[:num_sentences]
+
+    start = time.perf_counter()
+    expected = per_line_extract(sentences)
+    per_line_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = list(SPOExtractor(get_nlp(), batch_size).extract_lines(sentences))
+    batched_time = time.perf_counter() - start
+
+    if result != expected:
+        print("warning: batched triples differ from the per-line path")
+    print(f"{len(sentences)} sentences, batch_size={batch_size}")
+    print(f"per-line: {len(sentences) / per_line_time:.1f} sentences/sec")
+    print(f"batched:  {len(sentences) / batched_time:.1f} sentences/sec")
+    print(f"speedup: {per_line_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
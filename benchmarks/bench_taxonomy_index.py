@@ -0,0 +1,71 @@
+"""
+Benchmark: per-entity rescans of processed_data vs. the single-pass hypernym index.
+
+Usage: python benchmarks/bench_taxonomy_index.py [num_lines] [num_entities]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from taxonomy_induction import highest_confidence_many
+
+
+def make_pairs_file(path: str, num_lines: int, num_hyponyms: int, seed: int = 0):
+    """Writes a synthetic sorted processed_data file (hyponym\\thypernym\\tconf)."""
+    rng = random.Random(seed)
+    rows = [
+        f"hyponym {rng.randrange(num_hyponyms)}\thypernym {rng.randrange(1000)}\t{round(rng.random(), 4)}\n"
+        for _ in range(num_lines)
+    ]
+    rows.sort()
+    with open(path, "w", encoding="utf8") as f:
+        f.writelines(rows)
+
+
+def rescan_highest_confidence(req_hyponym: str, processed_data: str) -> str:
+    """The previous implementation: a full scan of processed_data per lookup."""
+    hyper = ""
+    max_conf = -1.0
+    with open(processed_data, "r", encoding="utf8") as fin:
+        for line in fin:
+            comps = line.rstrip().split("\t")
+            if comps[0].strip() == req_hyponym:
+                conf_value = float(comps[2])
+                if conf_value > max_conf:
+                    max_conf = conf_value
+                    hyper = comps[1].strip()
+    return hyper
+
+
+def main():
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    num_entities = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    num_hyponyms = max(num_lines // 10, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "processed_data.txt")
+        make_pairs_file(path, num_lines, num_hyponyms)
+        rng = random.Random(1)
+        entities = [f"hyponym {rng.randrange(num_hyponyms)}" for _ in range(num_entities)]
+
+        start = time.perf_counter()
+        expected = {e: rescan_highest_confidence(e, path) for e in entities}
+        rescan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = highest_confidence_many(entities, path)
+        index_time = time.perf_counter() - start
+
+    assert result == expected, "index and rescan results differ"
+    print(f"{num_lines} pairs, {num_entities} entities")
+    print(f"rescan: {rescan_time:.2f}s ({rescan_time / num_entities:.3f}s per entity)")
+    print(f"index:  {index_time:.2f}s")
+    print(f"speedup: {rescan_time / index_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmark suite: every extractor on deterministic synthetic corpora of several sizes.
+
+For each case and size, a fresh worker process (so peak RSS is per case) generates the
+corpus in a temporary directory, warms up (model loading is reported separately), then
+- runs the whole-corpus entry point `repeats` times: throughput = items / median run time,
+- calls the entry point on single documents: p50/p95 per-document latency.
+Batch jobs without a per-document entry point (clean_webIsALod, filter_by_probability)
+report the latency of whole runs instead (unit "run").
+
+Usage:
+    python benchmarks/run_benchmarks.py [--cases spo typing ...] [--sizes 100 1000]
+                                        [--output results.json] [--compare previous.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# run(): whole corpus; single(i): one document; samples: number of single() inputs
+Workload = namedtuple("Workload", ["items", "unit", "run", "single", "samples"])
+
+DEFAULT_SIZES = [100, 1000]
+DEFAULT_REPEATS = 3
+DEFAULT_LATENCY_SAMPLES = 50
+
+
+def spo_workload(size, samples):
+    from spo_extraction import your_extracting_function
+
+    synthetic.write_lines("sentences.txt", synthetic.sentences(size))
+    singles = [synthetic.write_lines(f"sentence{i}.txt", [sentence])
+               for i, sentence in enumerate(synthetic.sentences(samples, seed=1))]
+    return Workload(size, "sentence",
+                    lambda: your_extracting_function("sentences.txt", "spo_result.txt"),
+                    lambda i: your_extracting_function(singles[i], "spo_single.txt"), samples)
+
+
+def typing_workload(size, samples):
+    from dependency_matching import your_typing_function
+
+    synthetic.write_typing_file("typing.tsv", synthetic.typing_lines(size))
+    singles = [synthetic.write_typing_file(f"typing{i}.tsv", [row])
+               for i, row in enumerate(synthetic.typing_lines(samples, seed=1))]
+    return Workload(size, "sentence",
+                    lambda: your_typing_function("typing.tsv", "typing_result.tsv"),
+                    lambda i: your_typing_function(singles[i], "typing_single.tsv"), samples)
+
+
+def attributes_workload(size, samples):
+    from entity_extraction import your_extracting_function
+
+    synthetic.write_demonyms_file("demonyms.txt")
+    synthetic.write_abstracts_file("abstracts.csv", synthetic.abstracts(size))
+    singles = [synthetic.write_abstracts_file(f"abstract{i}.csv", [row])
+               for i, row in enumerate(synthetic.abstracts(samples, seed=1))]
+    return Workload(size, "abstract",
+                    lambda: your_extracting_function("abstracts.csv", "attributes_result.csv"),
+                    lambda i: your_extracting_function(singles[i], "attributes_single.csv"), samples)
+
+
+def diet_workload(size, samples):
+    from pattern_matching import your_solution
+
+    docs = synthetic.animal_docs(size)
+    singles = synthetic.animal_docs(samples, seed=1)
+    return Workload(size, "document",
+                    lambda: your_solution("cat", docs),
+                    lambda i: your_solution("cat", [singles[i]]), samples)
+
+
+def clean_workload(size, samples):
+    from taxonomy_induction import clean_webIsALod
+
+    lines = synthetic.webisalod_lines(size * 50)
+    synthetic.write_lines("webisalod.txt", lines)
+    return Workload(len(lines), "run", lambda: clean_webIsALod("webisalod.txt"), None, 0)
+
+
+def taxonomy_workload(size, samples):
+    from taxonomy_induction import clean_webIsALod, taxonomy_induction
+
+    synthetic.write_lines("webisalod.txt", synthetic.webisalod_lines(size * 50))
+    processed_data = clean_webIsALod("webisalod.txt")
+    synthetic.write_lines("entities.txt", synthetic.taxonomy_entities(size))
+    singles = [synthetic.write_lines(f"entity{i}.txt", [entity])
+               for i, entity in enumerate(synthetic.taxonomy_entities(samples, seed=1))]
+    return Workload(size, "entity",
+                    lambda: taxonomy_induction("entities.txt", processed_data, "taxonomy.tsv"),
+                    lambda i: taxonomy_induction(singles[i], processed_data, "taxonomy_single.tsv"), samples)
+
+
+def filter_workload(size, samples):
+    from prompt_generation import your_solution
+
+    rows = synthetic.probe_rows(size * 10)
+    synthetic.write_probe_outputs("probe", rows)
+    relations = set(synthetic.RELATIONS)
+    return Workload(len(rows), "run",
+                    lambda: your_solution(Path("probe"), [0.5, 0.1], relations, Path("filtered")), None, 0)
+
+
+CASES = {
+    "spo": spo_workload,
+    "typing": typing_workload,
+    "attributes": attributes_workload,
+    "diet": diet_workload,
+    "clean_webisalod": clean_workload,
+    "taxonomy_induction": taxonomy_workload,
+    "filter_by_probability": filter_workload,
+}
+
+
+def percentile(values, q):
+    """Linear-interpolated q-th percentile (0-100) of values."""
+    values = sorted(values)
+    if not values:
+        return None
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run_case(case, size, repeats, latency_samples):
+    """Runs one case in the current process and working directory; returns its result dict."""
+    start = time.perf_counter()
+    workload = CASES[case](size, min(size, latency_samples))
+    setup_seconds = time.perf_counter() - start
+
+    # The first call loads the models
+    warmup_seconds = timed(workload.single, 0) if workload.single else timed(workload.run)
+
+    run_seconds = [timed(workload.run) for _ in range(repeats)]
+    if workload.single:
+        latencies = [timed(workload.single, i) for i in range(workload.samples)]
+    else:
+        latencies = run_seconds
+
+    median = statistics.median(run_seconds)
+    return {
+        "case": case,
+        "size": size,
+        "items": workload.items,
+        "latency_unit": workload.unit,
+        "status": "ok",
+        "throughput_per_sec": round(workload.items / median, 2) if median else None,
+        "run_seconds": [round(seconds, 4) for seconds in run_seconds],
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "setup_seconds": round(setup_seconds, 3),
+        "warmup_seconds": round(warmup_seconds, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def worker(case, size, repeats, latency_samples):
+    """Entry point of a worker process: runs the case in a temporary directory and prints one JSON line."""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{case}_") as tmp:
+        os.chdir(tmp)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            result = run_case(case, size, repeats, latency_samples)
+        os.chdir(REPO_DIR)
+    print(json.dumps(result))
+
+
+def run_in_subprocess(case, size, repeats, latency_samples, timeout):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", case, str(size),
+               "--repeats", str(repeats), "--latency_samples", str(latency_samples)]
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"case": case, "size": size, "status": "error", "error": f"timed out after {timeout}s"}
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"case": case, "size": size, "status": "error", "error": lines[-1] if lines else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result, baseline=None):
+    label = f"{result['case']:<22} {result['size']:>7}"
+    if result["status"] != "ok":
+        print(f"{label}  error: {result['error']}")
+        return
+    line = (f"{label}  {result['throughput_per_sec']:>11.1f} items/s"
+            f"  p50 {result['latency_p50_ms']:>9.2f} ms  p95 {result['latency_p95_ms']:>9.2f} ms"
+            f" per {result['latency_unit']:<8}  peak RSS {result['peak_rss_mb']} MB")
+    previous = (baseline or {}).get((result["case"], result["size"]))
+    if previous and previous.get("status") == "ok" and previous.get("throughput_per_sec"):
+        change = result["throughput_per_sec"] / previous["throughput_per_sec"] - 1
+        line += f"  ({change:+.1%} throughput vs. baseline)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every extractor on synthetic corpora")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Documents per corpus")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Whole-corpus runs per case")
+    parser.add_argument("--latency_samples", type=int, default=DEFAULT_LATENCY_SAMPLES,
+                        help="Single-document calls for the latency percentiles")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds before a case is abandoned")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to save the JSON results")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare throughput against")
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], int(args.worker[1]), args.repeats, args.latency_samples)
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as f:
+            baseline = {(r["case"], r["size"]): r for r in json.load(f)["results"]}
+
+    results = []
+    for case in args.cases:
+        for size in args.sizes:
+            result = run_in_subprocess(case, size, args.repeats, args.latency_samples, args.timeout)
+            print_result(result, baseline)
+            results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "repeats": args.repeats,
+        "latency_samples": args.latency_samples,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
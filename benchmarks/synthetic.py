@@ -0,0 +1,182 @@
+"""
+Deterministic synthetic corpora for the benchmark suite.
+
+Every generator takes a size and a seed and returns the same data on every run and
+machine, so benchmark results of different commits are comparable. The write_* helpers
+produce the input files each extractor reads.
+"""
+import csv
+import os
+import random
+
+FIRST_NAMES = ["Marie", "Albert", "Ada", "Niels", "Lise", "Alan", "Emmy", "Max", "Rosalind", "Enrico"]
+LAST_NAMES = ["Curie", "Einstein", "Lovelace", "Bohr", "Meitner", "Turing", "Noether", "Planck", "Franklin", "Fermi"]
+MONTHS = ["January", "March", "May", "July", "September", "November"]
+DEMONYMS = [("French", "France"), ("German", "Germany"), ("Polish", "Poland"), ("Danish", "Denmark"),
+            ("Italian", "Italy"), ("British", "United Kingdom"), ("Austrian", "Austria")]
+UNIVERSITIES = ["University of Paris", "ETH Zurich", "University of Cambridge", "University of Copenhagen",
+                "Humboldt University", "Sapienza University"]
+AWARDS = ["Nobel Prize in Physics", "Copley Medal", "Max Planck Medal", "Royal Medal", "Matteucci Medal"]
+INSTITUTES = ["Radium Institute", "Institute for Advanced Study", "Niels Bohr Institute", "Kaiser Wilhelm Institute"]
+
+SUBJECTS = ["The company", "My brother", "The old river", "A small team", "The committee", "The museum",
+            "Her mother", "The young engineer", "A local farmer", "The national bank"]
+VERBS = ["was founded in", "works for", "flows through", "looked at", "has moved to", "discovered",
+         "is located near", "sold", "built", "visited"]
+OBJECTS = ["the city", "a large bank", "the northern valley", "the proposal", "radium", "the new office",
+           "a wooden bridge", "the old harbour", "the annual report", "a quiet village"]
+FILLERS = ["in 1990", "last year", "after the war", "with great care", "for many years", "", "", ""]
+
+TYPE_TEMPLATES = [
+    "{entity} is a {noun}.",
+    "{entity} is an {adjective} {noun} in the region.",
+    "The collection includes {entity} and other {noun}s.",
+    "{entity} was a famous {noun} of its time.",
+]
+TYPE_NOUNS = ["city", "river", "painter", "company", "album", "mountain", "novel", "scientist", "bridge", "village"]
+TYPE_ADJECTIVES = ["old", "important", "American", "early", "independent"]
+
+ANIMALS = ["cat", "dog", "fox", "owl", "bear", "goat", "horse", "rabbit"]
+FOODS = ["mice", "fish", "grass", "berries", "insects", "seeds", "meat", "carrots", "worms", "hay"]
+DIET_TEMPLATES = [
+    "The {animal} eats {food} every morning.",
+    "{animal}s feed on {food} in the winter.",
+    "A hungry {animal} munches fresh {food} near the barn.",
+    "Wild {animal}s consume {food} and {food2}.",
+    "In the summer the {animal} rests in the shade.",
+]
+
+HYPERNYMS = ["person", "city", "company", "animal", "country", "river", "instrument", "language", "sport", "plant"]
+RELATIONS = ["CountryBordersWithCountry", "RiverBasinsCountry", "PersonLanguage", "PersonProfession",
+             "PersonInstrument"]
+
+
+def sentences(size, seed=0):
+    """Simple subject-verb-object sentences for SPO extraction."""
+    rng = random.Random(seed)
+    return [" ".join(filter(None, [rng.choice(SUBJECTS), rng.choice(VERBS), rng.choice(OBJECTS),
+                                   rng.choice(FILLERS)])) + "."
+            for _ in range(size)]
+
+
+def typing_lines(size, seed=0):
+    """(sent_id, entity, sentence) rows for entity typing."""
+    rng = random.Random(seed)
+    rows = []
+    for sent_id in range(size):
+        entity = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        sentence = rng.choice(TYPE_TEMPLATES).format(entity=entity, noun=rng.choice(TYPE_NOUNS),
+                                                     adjective=rng.choice(TYPE_ADJECTIVES))
+        rows.append((sent_id, entity, sentence))
+    return rows
+
+
+def abstracts(size, seed=0):
+    """(entity, abstract) rows in the style of Wikipedia biographies."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        entity = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        demonym, country = rng.choice(DEMONYMS)
+        sentences_ = [
+            f"{entity} (born {rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(1850, 1950)}) "
+            f"was a {demonym} physicist.",
+            f"{entity} was born in {country}.",
+            f"{entity} studied physics and graduated from the {rng.choice(UNIVERSITIES)}.",
+            f"{entity} received the {rng.choice(AWARDS)} for research on radioactivity.",
+            f"Later {entity} worked as a professor at the {rng.choice(INSTITUTES)}.",
+        ]
+        rng.shuffle(sentences_)
+        rows.append((entity, " ".join(sentences_)))
+    return rows
+
+
+def animal_docs(size, seed=0):
+    """Documents ({"text", "url", "title"}) about animal diets, three to six sentences each."""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(size):
+        text = " ".join(
+            rng.choice(DIET_TEMPLATES).format(animal=rng.choice(ANIMALS), food=rng.choice(FOODS),
+                                              food2=rng.choice(FOODS))
+            for _ in range(rng.randint(3, 6))
+        )
+        docs.append({"text": text, "url": f"https://example.org/doc/{i}", "title": f"Document {i}"})
+    return docs
+
+
+def webisalod_lines(size, seed=0):
+    """Raw WebIsALOD lines ("hyponym;hypernym\\tconf\\t..."), some escaped, malformed or below threshold."""
+    rng = random.Random(seed)
+    num_hyponyms = max(size // 5, 1)
+    lines = []
+    for _ in range(size):
+        hyponym = f"hyponym_{rng.randrange(num_hyponyms)}"
+        roll = rng.random()
+        if roll < 0.05:
+            hyponym = hyponym.replace("_", "%2F")
+        elif roll < 0.07:
+            hyponym = "%27" + hyponym
+        elif roll < 0.08:
+            lines.append(f"{hyponym} without separator\n")
+            continue
+        hypernym = rng.choice(HYPERNYMS) + ("+entity" if rng.random() < 0.2 else "")
+        lines.append(f"{hyponym};{hypernym}\t{rng.random():.4f}\t{rng.randrange(1000)}\n")
+    return lines
+
+
+def taxonomy_entities(size, seed=0):
+    """Hyponyms to look up, drawn from the ones webisalod_lines(size * 50) generates."""
+    rng = random.Random(seed)
+    return [f"hyponym {rng.randrange(size * 10)}" for _ in range(size)]
+
+
+def probe_rows(size, seed=0, top_k=10):
+    """Probe output rows (Prompt, SubjectEntity, Relation, ObjectEntity, Probability) for size subjects."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        relation = RELATIONS[i % len(RELATIONS)]
+        entity = f"{rng.choice(FIRST_NAMES)} {i}"
+        probabilities = sorted((round(rng.random() ** 3, 4) for _ in range(top_k)), reverse=True)
+        for k, probability in enumerate(probabilities):
+            rows.append((f"{entity} {relation} [MASK].", entity, relation, f"object{k}", probability))
+    return rows
+
+
+def write_lines(path, lines):
+    with open(path, "w", encoding="utf8") as f:
+        f.writelines(line if line.endswith("\n") else line + "\n" for line in lines)
+    return path
+
+
+def write_typing_file(path, rows):
+    return write_lines(path, [f"{sent_id}\t{entity}\t{sentence}" for sent_id, entity, sentence in rows])
+
+
+def write_abstracts_file(path, rows):
+    with open(path, "w", encoding="utf8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["entity", "abstract"])
+        writer.writerows(rows)
+    return path
+
+
+def write_demonyms_file(path):
+    with open(path, "w", encoding="utf8", newline="") as f:
+        csv.writer(f).writerows(DEMONYMS)
+    return path
+
+
+def write_probe_outputs(directory, rows):
+    """Writes one <relation>.csv per relation, as probe_lm does."""
+    os.makedirs(directory, exist_ok=True)
+    by_relation = {relation: [] for relation in RELATIONS}
+    for row in rows:
+        by_relation[row[2]].append(row)
+    for relation, relation_rows in by_relation.items():
+        with open(os.path.join(directory, f"{relation}.csv"), "w", encoding="utf8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Prompt", "SubjectEntity", "Relation", "ObjectEntity", "Probability"])
+            writer.writerows(relation_rows)
+    return directory
@@ -7,58 +7,107 @@ Sample structure of run file run.py
 
 import sys
 
-import spacy 
-import nltk
-
-from spacy.matcher import DependencyMatcher 
 #from spacy import displacy 
-from nltk.corpus import wordnet as wn
-
-def your_typing_function(input_file, result_file):
-
-    nlp = spacy.load("en_core_web_sm")
-    matcher = DependencyMatcher(nlp.vocab)
-
-    pattern = [
-        [
-            {"RIGHT_ID": "anchor_root", "RIGHT_ATTRS": {"LEMMA": "be"}},
-            {"LEFT_ID": "anchor_root", "REL_OP": ">", "RIGHT_ID": "root_attr", "RIGHT_ATTRS": {"DEP": "attr"}}
-        ],
-        [
-            {"RIGHT_ID": "root_include", "RIGHT_ATTRS": {"LEMMA": "include"}},
-            {"LEFT_ID": "root_include", "REL_OP": ">", "RIGHT_ID": "include_dobj", "RIGHT_ATTRS": {"DEP": {"IN": ["dobj", "nsubj"]}}}
-        ]
+
+import instrumentation
+import nlp_models
+
+# Only POS, lemmas and the dependency parse are used by the typing patterns
+UNUSED_COMPONENTS = ["ner", "senter"]
+
+TYPING_PATTERNS = [
+    [
+        {"RIGHT_ID": "anchor_root", "RIGHT_ATTRS": {"LEMMA": "be"}},
+        {"LEFT_ID": "anchor_root", "REL_OP": ">", "RIGHT_ID": "root_attr", "RIGHT_ATTRS": {"DEP": "attr"}}
+    ],
+    [
+        {"RIGHT_ID": "root_include", "RIGHT_ATTRS": {"LEMMA": "include"}},
+        {"LEFT_ID": "root_include", "REL_OP": ">", "RIGHT_ID": "include_dobj", "RIGHT_ATTRS": {"DEP": {"IN": ["dobj", "nsubj"]}}}
     ]
+]
 
-    matcher.add("typing_patterns", pattern)
 
-    with open(input_file, 'r', encoding='utf8') as fin, \
-         open(result_file, 'w', encoding='utf8') as fout:
+def get_nlp():
+    """The shared typing pipeline, loaded on first use without the components it does not need."""
+    return nlp_models.get_nlp(exclude=UNUSED_COMPONENTS)
 
-        for line in fin:
 
-            comps = line.rstrip().split("\t")
+def build_typing_matcher(vocab):
+    """Compile the typing patterns into a DependencyMatcher."""
+    from spacy.matcher import DependencyMatcher
 
-            if len(comps) != 3:
-                continue
+    matcher = DependencyMatcher(vocab)
+    matcher.add("typing_patterns", TYPING_PATTERNS)
+    return matcher
+
+
+def extract_types(doc, matcher):
+    """Returns the distinct lemmas of the type tokens the typing patterns match in doc."""
+    types = []
+
+    with instrumentation.timer("typing.match"):
+        matches = matcher(doc)
+
+    for match_id, tokens in matches:
+        for token_index in tokens[1:]:
+            types.append(doc[token_index].lemma_)
 
+    return list(set(types))
+
+
+def read_typing_input(fin, malformed):
+    """
+    Yields (sentence, sent_id) for every well-formed "sent_id\tentity\tsentence" line.
+    Malformed lines are counted in malformed["count"]; the first one is kept in malformed["first"].
+    """
+    for line_no, line in enumerate(fin, start=1):
+        comps = line.rstrip().split("\t")
+        try:
+            if len(comps) != 3:
+                raise ValueError
             sent_id = int(comps[0])
-            entity = comps[1]
-            sentence = comps[2]
+        except ValueError:
+            malformed["count"] += 1
+            if malformed["first"] is None:
+                malformed["first"] = (line_no, line.rstrip())
+            continue
+        yield comps[2], sent_id
+
+
+def your_typing_function(input_file, result_file, batch_size=256, n_process=1):
+    """
+    Writes "sent_id\t[types]" for every sentence in input_file, in input order.
+    Sentences are parsed with nlp.pipe in batches of batch_size over n_process processes.
+    Returns the number of malformed input lines, which are skipped.
+    """
+    nlp = get_nlp()
+    matcher = build_typing_matcher(nlp.vocab)
+
+    malformed = {"count": 0, "first": None}
+
+    with open(input_file, 'r', encoding='utf8') as fin, \
+         open(result_file, 'w', encoding='utf8') as fout:
+
+        docs = nlp.pipe(read_typing_input(fin, malformed), as_tuples=True,
+                        batch_size=batch_size, n_process=n_process)
+
+        for doc, sent_id in instrumentation.timed_iter("typing.parse", docs):
 
-            doc = nlp(sentence)
+            instrumentation.count("typing.sentences")
 
-            types = []
+            types = extract_types(doc, matcher)
 
-            matches = matcher(doc)
+            with instrumentation.timer("typing.write"):
+                fout.write(str(sent_id) + "\t" + str(types) + "\n")
 
-            for match_id, tokens in matches:
-                for token_index in tokens[1:]:
-                    types.append(doc[token_index].lemma_)
+    instrumentation.count("typing.malformed", malformed["count"])
 
-            types = list(set(types))
+    if malformed["count"]:
+        line_no, line = malformed["first"]
+        print(f"Warning: skipped {malformed['count']} malformed lines in {input_file} "
+              f"(first at line {line_no}: {line!r})", file=sys.stderr)
 
-            fout.write(str(sent_id) + "\t" + str(types) + "\n")
+    return malformed["count"]
 
     
     
@@ -9,106 +9,182 @@ import sys
 import csv
 
 import re
-import spacy
 
-from spacy.matcher import Matcher
 from dateutil.parser import parse
 
-nlp = spacy.load('en_core_web_sm')
+import instrumentation
+import nlp_models
 
-def your_extracting_function(input_file, result_file):
+DOB_PATTERNS = [
+    [{'LOWER':'born'}, {'POS':'NUM'}, {'POS':'PROPN'}, {'POS':'NUM'}],
+    [{'LOWER':'born'}, {'POS':'PROPN'}, {'POS':'NUM'}, {'POS':'PUNCT','OP':'*'}, {'POS':'NUM'}]
+]
+
+# Patterns to identify nationality in sentences
+NATIONALITY_PATTERNS = [
+    [{'LEMMA':'be'}, {'ORTH': {'IN': ['a','an']}}, {'POS':'ADJ'}],
+    [{'LOWER':'born'}, {'LOWER':'in'}, {'POS':'PROPN'}, {'POS':'ADP','OP':'*'}]
+]
+
+ALMA_MATER_KEYWORDS = ['graduated', 'educated', 'study', 'studied', 'degree', 'doctorate', 'scholarship', 'PhD', 'honorary', 'B.A.', 'B.S.']
+AWARD_KEYWORDS = ['award','prize','medal','fellowship','emeritus','doctorate','preis']
+WORKPLACE_KEYWORDS = ['work','worked','working','position','professor','lecturer','founder','university','college','laboratory','institute']
+
+HEADERS = ['entity','dateOfBirth','nationality','almaMater','awards','workPlaces']
+
+
+def get_nlp():
+    """The shared full pipeline (entities, sentences and noun chunks are all used), loaded on first use."""
+    return nlp_models.get_nlp()
+
+
+def your_extracting_function(input_file, result_file, batch_size=64):
     """
     Reads an input CSV file and extracts structured information about entities.
     Saves the results to result_file in CSV format.
     """
+    EntityAttributeExtractor(get_nlp(), batch_size=batch_size).extract_file(input_file, result_file)
+
 
-    # Prepare CSV output
-    with open(result_file, 'w', encoding='utf8', newline="") as fout:
-        headers = ['entity','dateOfBirth','nationality','almaMater','awards','workPlaces']
-        writer = csv.writer(fout)
-        writer.writerow(headers)
+class EntityAttributeExtractor:
+    """
+    Extracts all entity attributes with patterns and demonyms loaded once.
+    Abstracts are parsed with nlp.pipe and every document is traversed once for all five fields.
+    """
+
+    def __init__(self, nlp, demonyms_file='demonyms.txt', batch_size=64):
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.country_dict = load_demonyms(demonyms_file)
+        from spacy.matcher import Matcher
+        self.matcher = Matcher(nlp.vocab)
+        self.matcher.add("DOB", DOB_PATTERNS)
+        self.matcher.add("Nationality", NATIONALITY_PATTERNS)
+        self.dob_id = nlp.vocab.strings["DOB"]
+        self.alma_mater_keywords = [k.lower() for k in ALMA_MATER_KEYWORDS]
+        self.award_keywords = [k.lower() for k in AWARD_KEYWORDS]
+        self.workplace_keywords = [k.lower() for k in WORKPLACE_KEYWORDS]
+
+    def extract(self, doc):
+        """Returns {field: values} for dateOfBirth, nationality, almaMater, awards and workPlaces."""
+        dob, nationality = set(), set()
+        with instrumentation.timer("attributes.match"):
+            matches = self.matcher(doc)
+        for match_id, start, end in matches:
+            span = doc[start:end]
+            if match_id == self.dob_id:
+                date = parse_dob(span)
+                if date:
+                    dob.add(date)
+            else:
+                nationality.update(span_nationalities(span, self.country_dict))
+
+        with instrumentation.timer("attributes.organizations"):
+            # Sentences mentioning studies, walked alongside the (ordered) entities
+            sents = [(sent.start, sent.end, any(k in sent.text.lower() for k in self.alma_mater_keywords))
+                     for sent in doc.sents]
+            almaMater, workPlaces = set(), set()
+            i = 0
+            for ent in doc.ents:
+                if ent.label_ != "ORG":
+                    continue
+                while i < len(sents) and sents[i][1] <= ent.start:
+                    i += 1
+                text = ent.text.replace("the","").strip()
+                if i < len(sents) and sents[i][2] and sents[i][0] <= ent.start and ent.end <= sents[i][1]:
+                    almaMater.add(text)
+                ent_text = ent.text.lower()
+                if any(k in ent_text for k in self.workplace_keywords):
+                    workPlaces.add(text)
+
+        with instrumentation.timer("attributes.awards"):
+            awards = set()
+            for chunk in doc.noun_chunks:
+                chunk_text = chunk.text.lower()
+                if any(k in chunk_text for k in self.award_keywords):
+                    awards.add(chunk.text.replace("the","").strip())
+
+        return {
+            'dateOfBirth': list(dob),
+            'nationality': list(nationality),
+            'almaMater': list(almaMater),
+            'awards': list(awards),
+            'workPlaces': list(workPlaces),
+        }
+
+    def extract_rows(self, rows):
+        """Yields (entity, fields) for (entity, abstract) rows, in input order."""
+        docs = self.nlp.pipe(((row[1], row[0]) for row in rows), as_tuples=True, batch_size=self.batch_size)
+        for doc, entity in instrumentation.timed_iter("attributes.parse", docs):
+            instrumentation.count("attributes.rows")
+            yield entity, self.extract(doc)
+
+    def extract_file(self, input_file, result_file):
+        """Writes the attributes of every row of input_file to result_file; 'NA' if no data found."""
+        with open(result_file, 'w', encoding='utf8', newline="") as fout, \
+             open(input_file, 'r', encoding='utf8') as fin:
+            writer = csv.writer(fout)
+            writer.writerow(HEADERS)
 
-        with open(input_file, 'r', encoding='utf8') as fin:
             reader = csv.reader(fin)
             next(reader)  # skip header row
 
-            for row in reader:
-                entity, abstract = row[0], row[1]
-
-                doc = nlp(abstract)
-
-                # Extract information using refactored functions
-                dateOfBirth = extract_dob(doc)
-                nationality = extract_nationality(doc)
-                almaMater = extract_almamater(doc)
-                awards = extract_awards(doc)
-                workPlaces = extract_workplace(doc)
-
-                # Write comma-separated values; 'NA' if no data found
-                writer.writerow([
-                    entity,
-                    ",".join(dateOfBirth) if dateOfBirth else "NA",
-                    ",".join(nationality) if nationality else "NA",
-                    ",".join(almaMater) if almaMater else "NA",
-                    ",".join(awards) if awards else "NA",
-                    ",".join(workPlaces) if workPlaces else "NA"
-                ])
+            for entity, fields in self.extract_rows(reader):
+                with instrumentation.timer("attributes.write"):
+                    writer.writerow([entity] + [",".join(fields[h]) if fields[h] else "NA" for h in HEADERS[1:]])
 
-# -------------------------
-# Extract Date of Birth
-# -------------------------
-def extract_dob(doc):
-    dob = []
-    matcher = Matcher(nlp.vocab)
-
-    patterns = [
-        [{'LOWER':'born'}, {'POS':'NUM'}, {'POS':'PROPN'}, {'POS':'NUM'}],
-        [{'LOWER':'born'}, {'POS':'PROPN'}, {'POS':'NUM'}, {'POS':'PUNCT','OP':'*'}, {'POS':'NUM'}]
-    ]
-    matcher.add("DOB", patterns)
-    matches = matcher(doc)
-
-    for _, start, end in matches:
-        span = doc[start:end]
-        try:
-            date = parse(span.text)
-            dob.append(date.strftime('%Y-%m-%d'))
-        except:
-            continue
 
-    return list(set(dob))
-
-# -------------------------
-# Extract Nationality
-# -------------------------
-def extract_nationality(doc):
-    nationality = []
-    matcher = Matcher(nlp.vocab)
-
-    # Load country dictionary (demonyms -> countries)
+def load_demonyms(demonyms_file='demonyms.txt'):
+    """Load country dictionary (demonyms -> countries)."""
     country_dict = {}
     try:
-        with open('demonyms.txt', encoding='utf8') as f:
+        with open(demonyms_file, encoding='utf8') as f:
             reader = csv.reader(f)
             for row in reader:
                 if len(row) >= 2:
                     country_dict[row[0].strip()] = row[1].strip()
     except FileNotFoundError:
         print("Warning: demonyms.txt not found. Nationality extraction may be incomplete.")
+    return country_dict
+
+
+def parse_dob(span):
+    """Returns the date in span as YYYY-MM-DD, or None if it cannot be parsed."""
+    with instrumentation.timer("attributes.dob_parse"):
+        try:
+            return parse(span.text).strftime('%Y-%m-%d')
+        except (ValueError, OverflowError):
+            return None
+
+
+def span_nationalities(span, country_dict):
+    """Returns the countries of the capitalised words in a nationality match."""
+    return [country_dict.get(word, word) for word in span.text.split()
+            if word[0].isupper() and word.lower() != 'born']
 
-    # Patterns to identify nationality in sentences
-    patterns = [
-        [{'LEMMA':'be'}, {'ORTH': {'IN': ['a','an']}}, {'POS':'ADJ'}],
-        [{'LOWER':'born'}, {'LOWER':'in'}, {'POS':'PROPN'}, {'POS':'ADP','OP':'*'}]
-    ]
-    matcher.add("Nationality", patterns)
-    matches = matcher(doc)
+# -------------------------
+# Extract Date of Birth
+# -------------------------
+def extract_dob(doc):
+    from spacy.matcher import Matcher
+    matcher = Matcher(doc.vocab)
+    matcher.add("DOB", DOB_PATTERNS)
+    dob = (parse_dob(doc[start:end]) for _, start, end in matcher(doc))
+    return list(set(date for date in dob if date))
 
-    for _, start, end in matches:
-        span = doc[start:end]
-        for word in span.text.split():
-            if word[0].isupper() and word.lower() != 'born':
-                nationality.append(country_dict.get(word, word))
+# -------------------------
+# Extract Nationality
+# -------------------------
+def extract_nationality(doc, country_dict=None):
+    if country_dict is None:
+        country_dict = load_demonyms()
+    from spacy.matcher import Matcher
+    matcher = Matcher(doc.vocab)
+    matcher.add("Nationality", NATIONALITY_PATTERNS)
+
+    nationality = []
+    for _, start, end in matcher(doc):
+        nationality.extend(span_nationalities(doc[start:end], country_dict))
 
     return list(set(nationality))
 
@@ -117,11 +193,10 @@ def extract_nationality(doc):
 # -------------------------
 def extract_almamater(doc):
     almaMater = []
-    keywords = ['graduated', 'educated', 'study', 'studied', 'degree', 'doctorate', 'scholarship', 'PhD', 'honorary', 'B.A.', 'B.S.']
 
     for sent in doc.sents:
         sent_text = sent.text.lower()
-        if any(k.lower() in sent_text for k in keywords):
+        if any(k.lower() in sent_text for k in ALMA_MATER_KEYWORDS):
             for ent in sent.ents:
                 if ent.label_ == "ORG":
                     almaMater.append(ent.text.replace("the","").strip())
@@ -133,11 +208,10 @@ def extract_almamater(doc):
 # -------------------------
 def extract_awards(doc):
     awards = []
-    keywords = ['award','prize','medal','fellowship','emeritus','doctorate','preis']
 
     for chunk in doc.noun_chunks:
         chunk_text = chunk.text.lower()
-        if any(k.lower() in chunk_text for k in keywords):
+        if any(k.lower() in chunk_text for k in AWARD_KEYWORDS):
             awards.append(chunk.text.replace("the","").strip())
 
     return list(set(awards))
@@ -147,11 +221,10 @@ def extract_awards(doc):
 # -------------------------
 def extract_workplace(doc):
     workPlace = []
-    keywords = ['work','worked','working','position','professor','lecturer','founder','university','college','laboratory','institute']
 
     for ent in doc.ents:
         ent_text = ent.text.lower()
-        if any(k.lower() in ent_text for k in keywords) and ent.label_ == "ORG":
+        if any(k.lower() in ent_text for k in WORKPLACE_KEYWORDS) and ent.label_ == "ORG":
             workPlace.append(ent.text.replace("the","").strip())
 
     return list(set(workPlace))
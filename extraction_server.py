@@ -0,0 +1,324 @@
+"""
+Long-lived extraction server that keeps the spaCy pipelines warm.
+
+Endpoints (JSON over HTTP, on a TCP port or a Unix socket):
+
+    GET  /health                                        -> {"status": "ok", "endpoints": [...]}
+    GET  /metrics                                       -> instrumentation metrics, Prometheus text format
+    POST /spo         {"sentences": [...]}              -> {"triples": [[subject, predicate, object] or null, ...]}
+    POST /typing      {"sentences": [...]}              -> {"types": [[type, ...], ...]}
+    POST /attributes  {"abstracts": [...]}              -> {"attributes": [{"dateOfBirth": [...], ...}, ...]}
+    POST /diet        {"animals": [...], "texts": [...]} -> {"diets": {animal: [[food, count], ...]}}
+
+Every endpoint has a MicroBatcher: texts of concurrent requests are queued and parsed
+together in one nlp.pipe call, as soon as max_batch_size texts are waiting or max_wait
+seconds after the first one arrived.
+
+Usage: python extraction_server.py [--port 8765 | --unix_socket /tmp/extraction.sock]
+"""
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dependency_matching
+import entity_extraction
+import instrumentation
+import pattern_matching
+import spo_extraction
+
+ENDPOINTS = ("spo", "typing", "attributes", "diet")
+
+# Diet matchers compiled for recent animal lists
+DIET_MATCHER_CACHE_SIZE = 64
+
+# Pending connections the listening socket accepts; bursts of concurrent requests are the point
+LISTEN_BACKLOG = 128
+
+
+class MicroBatcher:
+    """
+    Coalesces texts submitted from many threads into nlp.pipe micro-batches.
+    A single worker thread owns the pipeline: it parses each batch and calls
+    extract(doc, context) for every text, so the pipeline is never shared across threads.
+    """
+
+    def __init__(self, nlp, extract, max_batch_size=64, max_wait=0.01, pipe_kwargs=None):
+        self.nlp = nlp
+        self.extract = extract
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pipe_kwargs = pipe_kwargs or {}
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, texts, context=None):
+        """Queues texts and blocks until all are processed; returns their results in order."""
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, context, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Stops the worker once the queued texts are processed."""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            self.batches += 1
+            self.texts += len(batch)
+            try:
+                docs = self.nlp.pipe((text for text, _, _ in batch), batch_size=len(batch), **self.pipe_kwargs)
+                for doc, (_, context, future) in zip(docs, batch):
+                    try:
+                        future.set_result(self.extract(doc, context))
+                    except Exception as e:
+                        future.set_exception(e)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+def _strings(payload, key):
+    """payload[key] as a list of strings; ValueError otherwise."""
+    values = payload.get(key)
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"'{key}' must be a list of strings")
+    return values
+
+
+class ExtractionService:
+    """
+    The loaded extractors and one MicroBatcher per endpoint.
+    handle(path, payload) returns the JSON response of a request.
+    """
+
+    def __init__(self, endpoints=ENDPOINTS, max_batch_size=64, max_wait=0.01, demonyms_file="demonyms.txt"):
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown endpoints: {sorted(unknown)}")
+
+        batching = {"max_batch_size": max_batch_size, "max_wait": max_wait}
+        self.batchers = {}
+
+        if "spo" in endpoints:
+            spo = spo_extraction.SPOExtractor(spo_extraction.get_nlp())
+            self.batchers["spo"] = MicroBatcher(spo.nlp, lambda doc, _: spo.extract(doc),
+                                                pipe_kwargs={"disable": spo.disable}, **batching)
+
+        if "typing" in endpoints:
+            nlp = dependency_matching.get_nlp()
+            typing_matcher = dependency_matching.build_typing_matcher(nlp.vocab)
+            self.batchers["typing"] = MicroBatcher(
+                nlp, lambda doc, _: dependency_matching.extract_types(doc, typing_matcher), **batching)
+
+        if "attributes" in endpoints:
+            attributes = entity_extraction.EntityAttributeExtractor(entity_extraction.get_nlp(), demonyms_file)
+            self.batchers["attributes"] = MicroBatcher(attributes.nlp, lambda doc, _: attributes.extract(doc),
+                                                       **batching)
+
+        if "diet" in endpoints:
+            # Only touched by the diet worker thread
+            self._diet_matchers = {}
+            self.batchers["diet"] = MicroBatcher(pattern_matching.get_nlp(), self._diet, **batching)
+
+    def _diet(self, doc, animals):
+        matcher = self._diet_matchers.get(animals)
+        if matcher is None:
+            if len(self._diet_matchers) >= DIET_MATCHER_CACHE_SIZE:
+                self._diet_matchers.clear()
+            matcher = self._diet_matchers[animals] = pattern_matching.DietMatcher(doc.vocab, animals)
+        diets = {animal: Counter() for animal in animals}
+        matcher.update(doc, diets)
+        return diets
+
+    def spo(self, payload):
+        sentences = [sentence.strip() for sentence in _strings(payload, "sentences")]
+        triples = self.batchers["spo"].submit(sentences)
+        return {"triples": [list(triple) if triple else None for triple in triples]}
+
+    def typing(self, payload):
+        return {"types": self.batchers["typing"].submit(_strings(payload, "sentences"))}
+
+    def attributes(self, payload):
+        return {"attributes": self.batchers["attributes"].submit(_strings(payload, "abstracts"))}
+
+    def diet(self, payload):
+        animals = tuple(dict.fromkeys(_strings(payload, "animals")))
+        totals = {animal: Counter() for animal in animals}
+        for diets in self.batchers["diet"].submit(_strings(payload, "texts"), animals):
+            for animal, diet in diets.items():
+                totals[animal].update(diet)
+        return {"diets": {animal: diet.most_common() for animal, diet in totals.items()}}
+
+    def health(self):
+        return {
+            "status": "ok",
+            "endpoints": list(self.batchers),
+            "batches": {name: batcher.batches for name, batcher in self.batchers.items()},
+            "texts": {name: batcher.texts for name, batcher in self.batchers.items()},
+        }
+
+    def handle(self, path, payload):
+        """Returns (HTTP status, response dict) for a POST of payload to path."""
+        name = path.strip("/")
+        if name not in self.batchers:
+            return 404, {"error": f"Unknown endpoint: {path}"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "Request body must be a JSON object"}
+        try:
+            return 200, getattr(self, name)(payload)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+
+
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body, content_type="application/json"):
+        data = (body if isinstance(body, str) else json.dumps(body)).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._reply(200, self.server.service.health())
+        elif self.path.rstrip("/") == "/metrics":
+            self._reply(200, instrumentation.prometheus_text(), "text/plain; version=0.0.4")
+        else:
+            self._reply(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._reply(400, {"error": "Request body must be JSON"})
+            return
+        try:
+            status, body = self.server.service.handle(self.path, payload)
+        except Exception as e:
+            status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+        self._reply(status, body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else self.server.server_address
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ExtractionHTTPServer(ThreadingHTTPServer):
+
+    request_queue_size = LISTEN_BACKLOG
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+def make_server(service, host="127.0.0.1", port=8765, unix_socket=None, verbose=False):
+    """
+    Returns an HTTP server for service, bound to unix_socket if given, else to host:port
+    (port 0 picks a free port; see server.server_address). Run it with serve_forever().
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, ExtractionRequestHandler)
+    else:
+        server = ExtractionHTTPServer((host, port), ExtractionRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the extractors over HTTP with warm pipelines")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix_socket", default=None, help="Listen on this Unix socket instead of host:port")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS,
+                        help="Endpoints (and pipelines) to load")
+    parser.add_argument("--max_batch_size", type=int, default=64, help="Texts per nlp.pipe micro-batch")
+    parser.add_argument("--max_wait_ms", type=float, default=10.0,
+                        help="How long the first queued text waits for others to join its batch")
+    parser.add_argument("--demonyms_file", default="demonyms.txt")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    parser.add_argument("--metrics", action="store_true", help="Record stage timings, served on /metrics")
+    parser.add_argument("--component_timing", action="store_true", help="With --metrics, also time spaCy components")
+    args = parser.parse_args()
+
+    if args.metrics:
+        instrumentation.enable(component_timing=args.component_timing)
+
+    service = ExtractionService(args.endpoints, args.max_batch_size, args.max_wait_ms / 1000, args.demonyms_file)
+    server = make_server(service, args.host, args.port, args.unix_socket, args.verbose)
+    print(f"Serving {', '.join(service.batchers)} on {args.unix_socket or '%s:%d' % server.server_address[:2]}",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Lightweight stage timers and counters for the extraction pipelines.
+
+    with instrumentation.timer("spo.match"):
+        ...
+    instrumentation.count("spo.triples")
+    docs = instrumentation.timed_iter("spo.parse", nlp.pipe(texts))
+
+Everything is off by default: timer() then returns a shared no-op context manager,
+count() returns at once and timed_iter() returns its argument, so the calls can stay
+in production code. enable() turns recording on; with component_timing=True, pipelines
+loaded afterwards through nlp_models.get_nlp also time every spaCy component
+(see instrument_pipeline). Results are exported with write_json or write_prometheus.
+
+Setting EXTRACTION_METRICS_FILE enables recording at import and writes the file
+(.json, otherwise Prometheus text format) at exit; EXTRACTION_METRICS_COMPONENTS=1
+adds the per-component timings.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable
+
+_enabled = False
+_component_timing = False
+_lock = threading.Lock()
+
+# name -> [calls, total seconds, max seconds]
+_timers: Dict[str, list] = {}
+_counters: Dict[str, int] = {}
+
+
+def enable(component_timing: bool = False):
+    """Start recording; with component_timing, pipelines loaded from now on time their components."""
+    global _enabled, _component_timing
+    _enabled = True
+    _component_timing = component_timing
+
+
+def disable():
+    """Stop recording; what was recorded so far is kept until reset()."""
+    global _enabled, _component_timing
+    _enabled = False
+    _component_timing = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def component_timing_enabled() -> bool:
+    return _enabled and _component_timing
+
+
+def reset():
+    """Forget all recorded timings and counts."""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def record(name: str, seconds: float, calls: int = 1):
+    """Add seconds spent in stage name over calls calls."""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _timers.get(name)
+        if stats is None:
+            _timers[name] = [calls, seconds, seconds]
+        else:
+            stats[0] += calls
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+
+def count(name: str, n: int = 1):
+    """Add n to counter name."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _Timer:
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """Context manager adding the time spent in its block to stage name."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed_iter(name: str, iterable: Iterable) -> Iterable:
+    """
+    Adds the time spent producing each item of iterable (e.g. the parsing done lazily
+    by nlp.pipe) to stage name, one call per item. Returns iterable itself when disabled.
+    """
+    if not _enabled:
+        return iterable
+    return _timed_iter(name, iterable)
+
+
+def _timed_iter(name, iterable):
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        record(name, time.perf_counter() - start)
+        yield item
+
+# -------------------------
+# spaCy Component Timing
+# -------------------------
+class _TimedComponent:
+    """
+    Stands in for a pipeline component and records the time spent in it under
+    spacy.<name>. In nlp.pipe the components are chained generators, so the time
+    spent pulling documents from the upstream components is subtracted.
+    Timings of worker processes (n_process > 1) stay in those processes.
+    While recording is disabled, calls go straight to the wrapped component.
+    """
+
+    def __init__(self, name, proc):
+        self.timed_name = f"spacy.{name}"
+        self.proc = proc
+
+    def __call__(self, doc):
+        if not _enabled:
+            return self.proc(doc)
+        start = time.perf_counter()
+        doc = self.proc(doc)
+        record(self.timed_name, time.perf_counter() - start)
+        return doc
+
+    def pipe(self, stream, **kwargs):
+        if not _enabled:
+            return self.proc.pipe(stream, **kwargs) if hasattr(self.proc, "pipe") else map(self.proc, stream)
+        return self._timed_pipe(stream, **kwargs)
+
+    def _timed_pipe(self, stream, **kwargs):
+        upstream = [0.0]
+
+        # upstream sums the time between asking for and receiving each input document
+        def timed_stream():
+            upstream[0] -= time.perf_counter()
+            for doc in stream:
+                upstream[0] += time.perf_counter()
+                yield doc
+                upstream[0] -= time.perf_counter()
+            upstream[0] += time.perf_counter()
+
+        if hasattr(self.proc, "pipe"):
+            docs = iter(self.proc.pipe(timed_stream(), **kwargs))
+        else:
+            docs = (self.proc(doc) for doc in timed_stream())
+
+        while True:
+            start, pulled = time.perf_counter(), upstream[0]
+            try:
+                doc = next(docs)
+            except StopIteration:
+                return
+            record(self.timed_name, time.perf_counter() - start - (upstream[0] - pulled))
+            yield doc
+
+    def __getattr__(self, name):
+        if name == "proc":
+            raise AttributeError(name)
+        return getattr(self.proc, name)
+
+
+class _TimedTokenizer(_TimedComponent):
+
+    def pipe(self, texts, **kwargs):
+        for text in texts:
+            yield self(text)
+
+
+def instrument_pipeline(nlp):
+    """
+    Times the tokenizer and every component of nlp under spacy.<name>.
+    Called by nlp_models.get_nlp when component timing is enabled; safe to call twice.
+    """
+    if not isinstance(nlp.tokenizer, _TimedTokenizer):
+        nlp.tokenizer = _TimedTokenizer("tokenizer", nlp.tokenizer)
+    nlp._components = [
+        (name, proc if isinstance(proc, _TimedComponent) else _TimedComponent(name, proc))
+        for name, proc in nlp._components
+    ]
+    return nlp
+
+# -------------------------
+# Export
+# -------------------------
+def summary() -> dict:
+    """{"timers": {name: {calls, total_seconds, mean_seconds, max_seconds}}, "counters": {name: n}}"""
+    with _lock:
+        timers = {
+            name: {
+                "calls": calls,
+                "total_seconds": round(total, 6),
+                "mean_seconds": round(total / calls, 9) if calls else 0.0,
+                "max_seconds": round(maximum, 6),
+            }
+            for name, (calls, total, maximum) in sorted(_timers.items())
+        }
+        counters = dict(sorted(_counters.items()))
+    return {"timers": timers, "counters": counters}
+
+
+def _write_atomic(path: str, text: str):
+    """Writes text to a temporary file and renames it over path, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json(path: str):
+    _write_atomic(path, json.dumps(summary(), indent=2))
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def prometheus_text(prefix: str = "extraction") -> str:
+    """The recorded metrics in the Prometheus text exposition format."""
+    data = summary()
+    lines = []
+
+    metrics = [
+        ("stage_seconds_total", "counter", "Time spent in each stage.", "total_seconds"),
+        ("stage_calls_total", "counter", "Times each stage was entered.", "calls"),
+        ("stage_seconds_max", "gauge", "Longest single call of each stage.", "max_seconds"),
+    ]
+    for metric, kind, help_text, field in metrics:
+        lines.append(f"# HELP {prefix}_{metric} {help_text}")
+        lines.append(f"# TYPE {prefix}_{metric} {kind}")
+        for name, stats in data["timers"].items():
+            lines.append(f'{prefix}_{metric}{{stage="{_label(name)}"}} {stats[field]}')
+
+    lines.append(f"# HELP {prefix}_events_total Items counted by each counter.")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for name, value in data["counters"].items():
+        lines.append(f'{prefix}_events_total{{name="{_label(name)}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str, prefix: str = "extraction"):
+    """Writes the metrics for the Prometheus node exporter's textfile collector."""
+    _write_atomic(path, prometheus_text(prefix))
+
+
+def export(path: str):
+    """write_json for .json paths, write_prometheus otherwise."""
+    if path.endswith(".json"):
+        write_json(path)
+    else:
+        write_prometheus(path)
+
+
+METRICS_FILE = os.environ.get("EXTRACTION_METRICS_FILE")
+
+if METRICS_FILE:
+    enable(component_timing=os.environ.get("EXTRACTION_METRICS_COMPONENTS", "") not in ("", "0"))
+    atexit.register(export, METRICS_FILE)
@@ -0,0 +1,51 @@
+"""
+Lazy, process-wide registry of spaCy pipelines.
+
+Every extractor asks for the pipeline it needs through get_nlp instead of calling
+spacy.load at import time. A pipeline is loaded on first use and then shared by all
+callers that ask for the same model and component selection.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, Tuple
+
+import instrumentation
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+
+DEFAULT_MODEL = "en_core_web_sm"
+
+_pipelines: Dict[Tuple[str, frozenset, frozenset], "Language"] = {}
+_lock = threading.Lock()
+
+
+def get_nlp(name: str = DEFAULT_MODEL, exclude: Iterable[str] = (), disable: Iterable[str] = ()) -> "Language":
+    """
+    Return the pipeline for model name, loading it once per process.
+    exclude drops components entirely (they are never loaded); disable loads them switched off.
+    With instrumentation component timing enabled, the new pipeline times its components.
+    """
+    key = (name, frozenset(exclude), frozenset(disable))
+    nlp = _pipelines.get(key)
+    if nlp is None:
+        with _lock:
+            nlp = _pipelines.get(key)
+            if nlp is None:
+                import spacy
+                nlp = spacy.load(name, exclude=sorted(key[1]), disable=sorted(key[2]))
+                if instrumentation.component_timing_enabled():
+                    instrumentation.instrument_pipeline(nlp)
+                _pipelines[key] = nlp
+    return nlp
+
+
+def loaded_pipelines() -> Dict[Tuple[str, frozenset, frozenset], "Language"]:
+    """The pipelines loaded so far, keyed by (name, exclude, disable)."""
+    return dict(_pipelines)
+
+
+def clear():
+    """Forget all loaded pipelines."""
+    with _lock:
+        _pipelines.clear()
@@ -4,16 +4,43 @@ Date: 2022-06-03
 """
 
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
 
 from collections import Counter
 
-import spacy
-from spacy.matcher import Matcher
+import instrumentation
+import nlp_models
 
 logger = logging.getLogger(__name__)
 
-nlp = spacy.load("en_core_web_sm")
+# Diet patterns only look at tokens, POS tags and lemmas
+UNUSED_COMPONENTS = ["ner", "parser"]
+
+
+def get_nlp():
+    """The shared diet pipeline, loaded on first use without the components it does not need."""
+    return nlp_models.get_nlp(exclude=UNUSED_COMPONENTS)
+
+DIET_PATTERNS = [
+    # Pattern: animal eats NOUN
+    [{"LEMMA": "eat"}, {"POS": "NOUN"}],
+    # Pattern: animal feeds on NOUN
+    [{"LEMMA": "feed"}, {"POS": "ADP", "OP":"*"}, {"POS": "NOUN"}],
+    # Pattern: animal munches NOUN/ADJ
+    [{"LEMMA": {"IN": ["munch", "consume"]}}, {"POS": "ADJ", "OP":"*"}, {"POS": "NOUN"}],
+]
+
+
+def animal_pattern(animal: str) -> List[Dict]:
+    """Pattern: optional animal name + eat/feeds + object"""
+    return [{"LOWER": {"IN": [animal.lower(), animal.lower()+"s"]}}, {"LEMMA": {"IN": ["eat","feed"]}}, {"POS": "NOUN"}]
+
+
+def clean_food(text: str) -> str:
+    """Clean the span text and remove punctuation"""
+    food = text.lower().strip()
+    return "".join([c for c in food if c.isalnum() or c.isspace()])
+
 
 def your_solution(animal: str, doc_list: List[Dict[str, str]]) -> List[Tuple[str, int]]:
     """
@@ -23,37 +50,82 @@ def your_solution(animal: str, doc_list: List[Dict[str, str]]) -> List[Tuple[str
     :param doc_list: List of documents, each a dict with keys "text", "url", "title".
     :return: List of (food_item, frequency) tuples.
     """
+    return your_solution_many([animal], doc_list)[animal].most_common()
+
+
+class DietMatcher:
+    """
+    One Matcher for several animals: the animal-independent patterns under one ID,
+    the name pattern under one ID per animal. Repeated animal names are kept once.
+    """
+
+    def __init__(self, vocab, animals: List[str]):
+        from spacy.matcher import Matcher
+
+        self.animals = list(dict.fromkeys(animals))
+        self.matcher = Matcher(vocab)
+        self.matcher.add("DietPatterns", DIET_PATTERNS)
+        self.generic_id = vocab.strings["DietPatterns"]
+
+        self.animal_ids = {}
+        for animal in self.animals:
+            key = f"DietPatterns_{animal}"
+            self.matcher.add(key, [animal_pattern(animal)])
+            self.animal_ids[vocab.strings[key]] = animal
+
+    def update(self, doc, diets: Dict[str, Counter]):
+        """Add the foods found in doc to diets, a {animal: Counter} for the animals of this matcher."""
+        with instrumentation.timer("diet.match"):
+            matches = self.matcher(doc)
+        if not matches:
+            return
+
+        instrumentation.count("diet.matches", len(matches))
+
+        generic_id, animal_ids = self.generic_id, self.animal_ids
+        specific = {animal_ids[match_id] for match_id, _, _ in matches if match_id != generic_id}
+        generic = [clean_food(doc[start:end].text) for match_id, start, end in matches if match_id == generic_id]
+        generic = [food for food in generic if food]
+        generic_set = set(generic)
+
+        for animal in self.animals:
+            diet = diets[animal]
+            name = animal.lower()
+            if animal not in specific:
+                # Only the shared patterns matched for this animal
+                diet.update(generic if name not in generic_set else [food for food in generic if food != name])
+                continue
+
+            # Merge in matcher order; a span found by several patterns counts once, as with a single match ID
+            seen = set()
+            for match_id, start, end in matches:
+                if match_id != generic_id and animal_ids[match_id] != animal:
+                    continue
+                if (start, end) in seen:
+                    continue
+                seen.add((start, end))
+                food = clean_food(doc[start:end].text)
+                if food and food != name:
+                    diet[food] += 1
+
+
+def your_solution_many(animals: List[str], docs: Iterable[Dict[str, str]], batch_size: int = 64) -> Dict[str, Counter]:
+    """
+    Extract foods eaten by each of the given animals, parsing every document once.
+
+    :param animals: Animal names.
+    :param docs: Iterable of documents, each a dict with keys "text", "url", "title".
+    :param batch_size: Number of documents per nlp.pipe batch.
+    :return: {animal: Counter of food items}; counter.most_common() matches your_solution(animal, docs).
+    """
+    nlp = get_nlp()
+    matcher = DietMatcher(nlp.vocab, animals)
+
+    diets = {animal: Counter() for animal in matcher.animals}
+
+    docs = nlp.pipe((doc_dict["text"] for doc_dict in docs), batch_size=batch_size)
+    for doc in instrumentation.timed_iter("diet.parse", docs):
+        instrumentation.count("diet.documents")
+        matcher.update(doc, diets)
 
-    # Define patterns for Matcher
-    matcher = Matcher(nlp.vocab)
-
-    patterns = [
-        # Pattern: animal eats NOUN
-        [{"LEMMA": "eat"}, {"POS": "NOUN"}],
-        # Pattern: animal feeds on NOUN
-        [{"LEMMA": "feed"}, {"POS": "ADP", "OP":"*"}, {"POS": "NOUN"}],
-        # Pattern: animal munches NOUN/ADJ
-        [{"LEMMA": {"IN": ["munch", "consume"]}}, {"POS": "ADJ", "OP":"*"}, {"POS": "NOUN"}],
-        # Pattern: optional animal name + eat/feeds + object
-        [{"LOWER": {"IN": [animal.lower(), animal.lower()+"s"]}}, {"LEMMA": {"IN": ["eat","feed"]}}, {"POS": "NOUN"}],
-    ]
-
-    matcher.add("DietPatterns", patterns)
-
-    diets = []
-
-    for doc_dict in doc_list:
-        text = doc_dict["text"]
-        doc = nlp(text)
-        matches = matcher(doc)
-
-        for match_id, start, end in matches:
-            span = doc[start:end]
-            # Clean the span text and remove punctuation
-            food = span.text.lower().strip()
-            food = "".join([c for c in food if c.isalnum() or c.isspace()])
-            if food and food != animal.lower():
-                diets.append(food)
-
-    # Count frequency
-    return Counter(diets).most_common()
+    return diets
@@ -1,7 +1,10 @@
 import argparse
+import json
 import os
+import sqlite3
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import torch
 from transformers import AutoModelForMaskedLM, AutoTokenizer, pipeline
@@ -18,10 +21,40 @@ RELATIONS = {
     "PersonInstrument"
 }
 
-def initialize_lm(model_type, top_k):
+def configure_cpu_threads(num_threads: int = None, num_interop_threads: int = None):
+    """
+    Set torch's intra-op and inter-op thread pools explicitly.
+    Inter-op threads can only be set before torch runs its first parallel work.
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            print("Warning: inter-op threads already initialised; keeping", torch.get_num_interop_threads())
+
+
+_lm_cache = {}
+
+
+def initialize_lm(model_type, top_k, quantize: bool = False, revision: str = "main"):
+    ### loaded pipelines are kept per process, so repeated calls reuse the same model
+    key = (model_type, top_k, quantize, revision)
+    if key not in _lm_cache:
+        _lm_cache[key] = _load_lm(model_type, top_k, quantize, revision)
+    return _lm_cache[key]
+
+
+def _load_lm(model_type, top_k, quantize, revision):
     ### using the HuggingFace pipeline to initialize the model and its corresponding tokenizer
-    tokenizer = AutoTokenizer.from_pretrained(model_type)
-    model = AutoModelForMaskedLM.from_pretrained(model_type).to(device)
+    tokenizer = AutoTokenizer.from_pretrained(model_type, revision=revision)
+    model = AutoModelForMaskedLM.from_pretrained(model_type, revision=revision).to(device)
+    if quantize:
+        ### dynamic int8 quantization of the linear layers; only supported on CPU
+        if device != torch.device("cpu"):
+            raise ValueError("Dynamic int8 quantization is only available on CPU")
+        model = torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
     device_id = (
         -1 if device == torch.device("cpu") else 0
     )  ### -1 device is for cpu, 0 for gpu
@@ -30,6 +63,53 @@ def initialize_lm(model_type, top_k):
     )  ### top_k defines the number of ranked output tokens to pick in the [MASK] position
     return nlp, tokenizer.mask_token
 
+def get_mask_token(model_type, revision: str = "main") -> str:
+    """Return the mask token of a model from its tokenizer alone, without loading the model."""
+    return AutoTokenizer.from_pretrained(model_type, revision=revision).mask_token
+
+
+# -------------------------
+# Prompt Result Cache
+# -------------------------
+class PromptCache:
+    """
+    Persistent SQLite cache of fill-mask predictions keyed by (model, prompt, top_k).
+    model should identify the weights, e.g. "bert-base-uncased@main"; each stored
+    batch is committed immediately so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path: Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "model TEXT, prompt TEXT, top_k INTEGER, outputs TEXT, PRIMARY KEY (model, prompt, top_k))"
+        )
+
+    def get_many(self, model: str, prompts: list, top_k: int) -> dict:
+        """Return {prompt: [(token_str, score), ...]} for the cached prompts."""
+        found = {}
+        for i in range(0, len(prompts), 500):
+            chunk = prompts[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT prompt, outputs FROM predictions WHERE model = ? AND top_k = ? "
+                f"AND prompt IN ({', '.join('?' * len(chunk))})", [model, top_k, *chunk]
+            )
+            found.update((prompt, [tuple(out) for out in json.loads(outputs)]) for prompt, outputs in rows)
+        return found
+
+    def put_many(self, model: str, top_k: int, predictions: dict):
+        """Store {prompt: [(token_str, score), ...]} and commit."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+            [(model, prompt, top_k, json.dumps(outputs)) for prompt, outputs in predictions.items()]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
 def create_prompt(subject_entity: str, relation: str, mask_token: str) -> str:
     """
     Create relation-specific prompt with [MASK] token.
@@ -44,59 +124,233 @@ def create_prompt(subject_entity: str, relation: str, mask_token: str) -> str:
 
     return relation_prompts.get(relation, f"{subject_entity} relates to {mask_token}.")
 
+def length_order(tokenizer, prompts: list) -> list:
+    """
+    Indices of prompts sorted by token length, so that each batch only pads
+    to the length of similar prompts instead of the longest one overall.
+    """
+    lengths = [len(ids) for ids in tokenizer(prompts)["input_ids"]]
+    return sorted(range(len(prompts)), key=lengths.__getitem__)
+
+
 # -------------------------
 # Probing LM
 # -------------------------
-def probe_lm(model_name: str, top_k: int, relation: str, subject_entities: list, output_dir: Path):
+def probe_lm(model_name: str, top_k: int, relation: str, subject_entities: list, output_dir: Path,
+             nlp_pipeline=None, mask_token: str = None, batch_size: int = 32, bucket_by_length: bool = False,
+             cache: PromptCache = None, revision: str = "main", quantize: bool = False,
+             output_format: str = "csv"):
     """
     Probe masked LM for all subject entities for a given relation.
-    Save outputs with token probabilities to CSV.
+    Pass nlp_pipeline and mask_token from initialize_lm to reuse one loaded model across relations.
+    Prompts are fed to the pipeline as a generator in batches of batch_size, optionally
+    in order of token length (bucket_by_length); results keep the entity order.
+    With a cache, prompts probed before are not run again and every batch is stored as
+    it completes; the model is only loaded if some prompt is missing from the cache.
+    Save outputs with token probabilities to CSV or, with output_format="parquet", to Parquet.
     """
-    nlp_pipeline, mask_token = initialize_lm(model_name, top_k)
-    results = []
+    if mask_token is None:
+        mask_token = nlp_pipeline.tokenizer.mask_token if nlp_pipeline else get_mask_token(model_name, revision)
+    prompts = [create_prompt(entity, relation, mask_token) for entity in subject_entities]
+    cache_model = f"{model_name}@{revision}" + ("+int8" if quantize else "")
+    predictions = cache.get_many(cache_model, list(set(prompts)), top_k) if cache else {}
+    missing = list(dict.fromkeys(prompt for prompt in prompts if prompt not in predictions))
+
+    print(f"Probing {model_name} for {len(missing)} of {len(prompts)} entities ({relation})")
+    if missing:
+        if nlp_pipeline is None:
+            nlp_pipeline, _ = initialize_lm(model_name, top_k, quantize=quantize, revision=revision)
+        if bucket_by_length:
+            missing = [missing[i] for i in length_order(nlp_pipeline.tokenizer, missing)]
 
-    for entity in subject_entities:
-        print(f"Probing {model_name} for {entity} ({relation})")
-        prompt = create_prompt(entity, relation, mask_token)
-        outputs = nlp_pipeline(prompt)
+        with torch.inference_mode():
+            outputs = nlp_pipeline((prompt for prompt in missing), batch_size=batch_size, top_k=top_k)
+            batch = {}
+            for prompt, prompt_outputs in zip(missing, outputs):
+                batch[prompt] = [(out["token_str"], out["score"]) for out in prompt_outputs]
+                if len(batch) == batch_size:
+                    predictions.update(batch)
+                    if cache:
+                        cache.put_many(cache_model, top_k, batch)
+                    batch = {}
+            predictions.update(batch)
+            if cache and batch:
+                cache.put_many(cache_model, top_k, batch)
 
-        for out in outputs:
+    results = []
+    for entity, prompt in zip(subject_entities, prompts):
+        for token_str, score in predictions[prompt]:
             results.append({
                 "Prompt": prompt,
                 "SubjectEntity": entity,
                 "Relation": relation,
-                "ObjectEntity": out["token_str"],
-                "Probability": round(out["score"], 4)
+                "ObjectEntity": token_str,
+                "Probability": round(score, 4)
             })
 
     # Save raw prompt outputs
     df = pd.DataFrame(results).sort_values(by=["SubjectEntity", "Probability"], ascending=[True, False])
+    save_probe_output(df, output_dir, relation, output_format)
+
+
+# -------------------------
+# Probe Output Storage
+# -------------------------
+PROBE_OUTPUT_FORMATS = ("csv", "parquet")
+
+# Columns repeated on every row of an entity or relation; stored dictionary-encoded
+CATEGORICAL_COLUMNS = ["Prompt", "SubjectEntity", "Relation"]
+
+
+def save_probe_output(df: pd.DataFrame, output_dir: Path, relation: str, output_format: str = "csv"):
+    """
+    Save the probe output of a relation as <relation>.csv or <relation>.parquet.
+    In Parquet the Prompt, SubjectEntity and Relation columns are dictionary-encoded.
+    The relation's output in the other format, left by an earlier run, is removed so
+    read_probe_outputs never picks up stale data.
+    """
+    if output_format not in PROBE_OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {PROBE_OUTPUT_FORMATS}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for other_format in PROBE_OUTPUT_FORMATS:
+        if other_format != output_format:
+            (output_dir / f"{relation}.{other_format}").unlink(missing_ok=True)
+    if output_format == "parquet":
+        df = df.astype({column: "category" for column in CATEGORICAL_COLUMNS if column in df.columns})
+        df.to_parquet(output_dir / f"{relation}.parquet", index=False)
+    else:
+        df.to_csv(output_dir / f"{relation}.csv", index=False)
+
+
+def read_probe_outputs(input_dir: Path, relations: set):
+    """
+    Read the probe outputs of all relations into one frame, from <relation>.parquet or
+    <relation>.csv. If a directory written before save_probe_output removed stale files
+    has both, the newer one is read. Relations are read in sorted order; rows keep their file order.
+    Returns the frame and {relation: columns of its file}, since compact candidate
+    outputs have no Prompt column and the combined frame has the union of both.
+    Probabilities are read as float64, so float32 scores in older Parquet files export
+    as the same 4-decimal values as CSV.
+    """
+    frames, columns = [], {}
+    for relation in sorted(relations):
+        parquet_path, csv_path = input_dir / f"{relation}.parquet", input_dir / f"{relation}.csv"
+        if parquet_path.exists() and csv_path.exists():
+            print(f"Both {parquet_path.name} and {csv_path.name} exist; reading the newer one")
+            use_parquet = parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+        else:
+            use_parquet = parquet_path.exists()
+        frame = pd.read_parquet(parquet_path) if use_parquet else pd.read_csv(csv_path)
+        if frame["Probability"].dtype != np.float64:
+            frame["Probability"] = frame["Probability"].astype(np.float64).round(4)
+        frames.append(frame)
+        columns[relation] = list(frame.columns)
+    df = pd.concat(frames, ignore_index=True)
+    return df.astype({column: "category" for column in CATEGORICAL_COLUMNS if column in df.columns}), columns
+
+
+def export_csv(df: pd.DataFrame, output_dir: Path, relations: set, columns: dict = None):
+    """
+    Write one <relation>.csv per relation from a combined frame, for graders.
+    columns ({relation: column list}, as from read_probe_outputs) selects and orders
+    each relation's columns; by default all columns of df are written.
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_dir / f"{relation}.csv", index=False)
+    for relation in sorted(relations):
+        rows = df[df["Relation"] == relation]
+        if columns:
+            rows = rows[columns[relation]]
+        rows.to_csv(output_dir / f"{relation}.csv", index=False)
+
+# -------------------------
+# Candidate-constrained Probing
+# -------------------------
+def load_candidates(candidates_dir: Path, relation: str) -> list:
+    """
+    Read the candidate objects of a relation from candidates_dir/<relation>.txt, one per line.
+    Returns an empty list if the relation has no candidate file.
+    """
+    path = candidates_dir / f"{relation}.txt"
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf8") as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+
+def candidate_token_ids(tokenizer, candidates: list):
+    """
+    Map candidates to vocabulary IDs once.
+    Only candidates that are a single vocabulary token can fill one [MASK]; the others are skipped.
+    """
+    kept, ids = [], []
+    for candidate in candidates:
+        token_ids = tokenizer(candidate, add_special_tokens=False)["input_ids"]
+        if len(token_ids) == 1:
+            kept.append(candidate)
+            ids.append(token_ids[0])
+    if len(kept) < len(candidates):
+        print(f"Skipping {len(candidates) - len(kept)} multi-token candidates")
+    return kept, torch.tensor(ids, dtype=torch.long)
+
+
+def probe_lm_candidates(nlp_pipeline, mask_token: str, relation: str, subject_entities: list,
+                        candidates: list, output_dir: Path, batch_size: int = 32, output_format: str = "csv"):
+    """
+    Score only the given candidate objects for every subject entity.
+    The mask-position logits of a batch are softmaxed over the vocabulary and the candidate
+    columns are read in one tensor operation, so probabilities match the fill-mask scores.
+    Save compact outputs (no prompt column, one row per entity and candidate) like probe_lm.
+    """
+    model, tokenizer = nlp_pipeline.model, nlp_pipeline.tokenizer
+    candidates, candidate_ids = candidate_token_ids(tokenizer, candidates)
+    candidate_ids = candidate_ids.to(model.device)
+
+    print(f"Scoring {len(candidates)} candidates for {len(subject_entities)} entities ({relation})")
+    scores = []
+    with torch.inference_mode():
+        for i in range(0, len(subject_entities), batch_size):
+            prompts = [create_prompt(entity, relation, mask_token) for entity in subject_entities[i:i + batch_size]]
+            inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+            logits = model(**inputs).logits
+            rows, cols = (inputs["input_ids"] == tokenizer.mask_token_id).nonzero(as_tuple=True)
+            probs = logits[rows, cols].softmax(dim=-1)[:, candidate_ids]
+            scores.append(probs.cpu())
+
+    probs = torch.cat(scores).numpy() if scores else np.zeros((0, len(candidates)))
+    df = pd.DataFrame({
+        "SubjectEntity": np.repeat(subject_entities, len(candidates)),
+        "Relation": relation,
+        "ObjectEntity": np.tile(candidates, len(subject_entities)),
+        "Probability": probs.astype(np.float64).reshape(-1).round(4),
+    }).sort_values(by=["SubjectEntity", "Probability"], ascending=[True, False])
+    save_probe_output(df, output_dir, relation, output_format)
 
 # -------------------------
 # Apply Probability Threshold
 # -------------------------
-def filter_by_probability(input_dir: Path, thresholds: list, relations: set, output_dir: Path):
+def filter_by_probability(input_dir: Path, thresholds: list, relations: set, output_dir: Path,
+                          per_subject: bool = False):
     """
     Select predicted tokens based on probability thresholds.
+    All relations are filtered in one vectorized pass: a relation keeps the rows at or above
+    thresholds[0] if it has any, otherwise those at or above thresholds[1]. With per_subject,
+    that fallback is decided per (relation, subject entity) instead of per relation.
+    The filtered rows are exported as one CSV per relation.
     """
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    for relation in relations:
-        df = pd.read_csv(input_dir / f"{relation}.csv")
-        thresh = thresholds[0] if (df["Probability"] >= thresholds[0]).any() else thresholds[1]
-        df_filtered = df[df["Probability"] >= thresh]
-        df_filtered.to_csv(output_dir / f"{relation}.csv", index=False)
+    df, columns = read_probe_outputs(input_dir, relations)
+    keys = ["Relation", "SubjectEntity"] if per_subject else ["Relation"]
+    best = df.groupby(keys, observed=True, sort=False)["Probability"].transform("max")
+    thresh = np.where(best >= thresholds[0], thresholds[0], thresholds[1])
+    export_csv(df[df["Probability"] >= thresh], output_dir, relations, columns)
 
 # -------------------------
 # Main Solution
 # -------------------------
-def your_solution(input_dir: Path, prob_threshold: list, relations: set, output_dir: Path):
+def your_solution(input_dir: Path, prob_threshold: list, relations: set, output_dir: Path, per_subject: bool = False):
     """
     Filter the prompt outputs based on probability thresholds.
     """
-    filter_by_probability(input_dir, prob_threshold, relations, output_dir)
+    filter_by_probability(input_dir, prob_threshold, relations, output_dir, per_subject)
 
 # -------------------------
 # CLI Entry Point
@@ -107,6 +361,20 @@ def main():
     parser.add_argument("--input_dir", type=str, default="./dataset/test/", help="Input CSV directory")
     parser.add_argument("--prompt_output_dir", type=str, default="./prompt_output/", help="Prompt outputs directory")
     parser.add_argument("--solution_output_dir", type=str, default="./solution/", help="Filtered outputs directory")
+    parser.add_argument("--batch_size", type=int, default=32, help="Prompts per fill-mask batch")
+    parser.add_argument("--cpu_fast", action="store_true",
+                        help="CPU fast path: dynamic int8 quantization and length-bucketed batches")
+    parser.add_argument("--num_threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--num_interop_threads", type=int, default=None, help="torch inter-op threads")
+    parser.add_argument("--revision", type=str, default="main", help="Model revision (branch, tag or commit)")
+    parser.add_argument("--cache_file", type=str, default=None,
+                        help="Prompt result cache (default: <prompt_output_dir>/prompt_cache.sqlite)")
+    parser.add_argument("--output_format", type=str, default="csv", choices=PROBE_OUTPUT_FORMATS,
+                        help="Storage format of the raw prompt outputs")
+    parser.add_argument("--per_subject_threshold", action="store_true",
+                        help="Fall back to the lower threshold per subject entity instead of per relation")
+    parser.add_argument("--candidates_dir", type=str, default=None,
+                        help="Directory of <relation>.txt candidate lists; relations with one are scored on those candidates only")
     args = parser.parse_args()
 
     model_name = args.model_type
@@ -117,13 +385,25 @@ def main():
     top_k = 200
     prob_threshold = [0.3, 0.1]
 
-    # Probe LM for each relation
+    # Probe LM for each relation; the model is loaded once, and only if a prompt is not cached
+    configure_cpu_threads(args.num_threads, args.num_interop_threads)
+    mask_token = get_mask_token(model_name, args.revision)
+    cache = PromptCache(Path(args.cache_file) if args.cache_file else prompt_dir / "prompt_cache.sqlite")
     for relation in RELATIONS:
         entities = pd.read_csv(input_dir / f"{relation}.csv")["SubjectEntity"].drop_duplicates().tolist()
-        probe_lm(model_name, top_k, relation, entities, prompt_dir)
+        candidates = load_candidates(Path(args.candidates_dir), relation) if args.candidates_dir else []
+        if candidates:
+            nlp_pipeline, _ = initialize_lm(model_name, top_k, quantize=args.cpu_fast, revision=args.revision)
+            probe_lm_candidates(nlp_pipeline, mask_token, relation, entities, candidates, prompt_dir, args.batch_size,
+                                args.output_format)
+        else:
+            probe_lm(model_name, top_k, relation, entities, prompt_dir, mask_token=mask_token,
+                     batch_size=args.batch_size, bucket_by_length=args.cpu_fast, cache=cache,
+                     revision=args.revision, quantize=args.cpu_fast, output_format=args.output_format)
+    cache.close()
 
     # Filter outputs by probability threshold
-    your_solution(prompt_dir, prob_threshold, RELATIONS, solution_dir)
+    your_solution(prompt_dir, prob_threshold, RELATIONS, solution_dir, args.per_subject_threshold)
 
 
 if __name__ == "__main__":
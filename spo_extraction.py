@@ -5,54 +5,103 @@ Sample structure of run file run.py
 @author: cxchu
 '''
 
+from __future__ import annotations
+
 import sys
-import spacy
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+import instrumentation
+import nlp_models
+
+# spaCy is imported where it is used, so importing this module does not import it
+if TYPE_CHECKING:
+    import spacy
+    from spacy.matcher import Matcher
+
+VERB_PHRASE_PATTERNS = [
+    [{"POS": "AUX"}, {"POS": "VERB"}, {"POS": "ADP"}],
+    [{"POS": "NOUN"}, {"POS": "VERB"}, {"POS": "ADP", "OP": "*"}],
+    [{"POS": "NOUN", "OP": "*"}, {"POS": "SCONJ"}, {"POS": "VERB"}, {"POS": "ADP"}, {"POS": "DET", "OP": "*"}],
+    [{"POS": "VERB"}, {"POS": "NOUN", "OP": "*"}, {"POS": "ADP", "OP": "*"}, {"POS": "DET", "OP": "*"}],
+    [{"POS": "SCONJ"}, {"POS": "VERB"}, {"POS": "ADP"}],
+    [{"POS": "ADV"}, {"POS": "VERB"}, {"POS": "PRON", "OP": "*"}],
+    [{"POS": "VERB", "OP": "?"}, {"POS": "ADV", "OP": "*"}, {"POS": "VERB", "OP": "+"}]
+]
+
+# Pipeline components the SPO logic never looks at
+UNUSED_COMPONENTS = ["ner", "lemmatizer"]
+
 
-from spacy.matcher import Matcher
-from spacy.util import filter_spans
+def get_nlp():
+    """The shared SPO pipeline, loaded on first use without the components it does not need."""
+    return nlp_models.get_nlp(exclude=UNUSED_COMPONENTS)
 
-nlp = spacy.load("en_core_web_sm")
 
-def your_extracting_function(input_file: str, result_file: str):
+def build_predicate_matcher(vocab) -> Matcher:
+    """Compile the verb-phrase patterns into a Matcher."""
+    from spacy.matcher import Matcher
+
+    matcher = Matcher(vocab)
+    matcher.add("VerbPhrase", VERB_PHRASE_PATTERNS)
+    return matcher
+
+
+class SPOExtractor:
     """
-    Reads sentences from input_file and extracts SPO triples.
-    Writes results to result_file.
+    Extracts SPO triples with a Matcher compiled once, streaming sentences
+    through nlp.pipe in batches of batch_size.
     """
-    with open(result_file, "w", encoding="utf8") as fout, open(input_file, "r", encoding="utf8") as fin:
-        line_id = 1
-        for line in fin:
-            line = line.strip()
-            if not line:
-                continue
 
-            doc = nlp(line)
-            verbs = {}
+    def __init__(self, nlp, batch_size: int = 256):
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.matcher = build_predicate_matcher(nlp.vocab)
+        self.disable = [name for name in UNUSED_COMPONENTS if name in nlp.pipe_names]
 
-            # Extract predicates (verbs)
-            predicates = get_predicates(doc)
-            if not predicates:
-                continue
+    def extract(self, doc) -> Optional[Tuple[str, str, str]]:
+        """Return (subject, predicate root, object) for a parsed sentence, or None."""
+        with instrumentation.timer("spo.match"):
+            predicates = get_predicates(doc, self.matcher)
+        if not predicates:
+            return None
 
+        with instrumentation.timer("spo.arguments"):
             # Choose the longest predicate as main
             full_predicate = get_full_predicate(predicates)
-            key = str(full_predicate.root)
-            if key not in verbs:
-                verbs[key] = {"subject": "", "object": ""}
-
             noun_chunks = list(doc.noun_chunks)
 
             subject = get_subject(full_predicate, noun_chunks)
             object_ = get_object(full_predicate, noun_chunks)
-
-            verbs[key]["subject"] = str(subject)
-            verbs[key]["object"] = str(object_)
-
-            # Format output compatible with OIE reader
-            if subject and object_:
-                fout.write(line + "\n")
-                for k, v in verbs.items():
-                    fout.write(f'{line_id}\t"{v["subject"]}"\t"{k}"\t"{v["object"]}"\t0\n')
-                line_id += 1
+        if not (subject and object_):
+            return None
+        return str(subject), str(full_predicate.root), str(object_)
+
+    def extract_lines(self, lines: Iterable[str]) -> Iterator[Tuple[str, Tuple[str, str, str]]]:
+        """Yield (sentence, triple) for every sentence a triple was found in, in input order."""
+        sentences = (line.strip() for line in lines)
+        docs = self.nlp.pipe((line for line in sentences if line), batch_size=self.batch_size, disable=self.disable)
+        for doc in instrumentation.timed_iter("spo.parse", docs):
+            instrumentation.count("spo.sentences")
+            triple = self.extract(doc)
+            if triple:
+                instrumentation.count("spo.triples")
+                yield doc.text, triple
+
+    def extract_file(self, input_file: str, result_file: str):
+        """Write the triples of input_file to result_file in the OIE reader format."""
+        with open(result_file, "w", encoding="utf8") as fout, open(input_file, "r", encoding="utf8") as fin:
+            for line_id, (line, (subject, predicate, object_)) in enumerate(self.extract_lines(fin), start=1):
+                with instrumentation.timer("spo.write"):
+                    fout.write(line + "\n")
+                    fout.write(f'{line_id}\t"{subject}"\t"{predicate}"\t"{object_}"\t0\n')
+
+
+def your_extracting_function(input_file: str, result_file: str, batch_size: int = 256):
+    """
+    Reads sentences from input_file and extracts SPO triples.
+    Writes results to result_file.
+    """
+    SPOExtractor(get_nlp(), batch_size).extract_file(input_file, result_file)
 
 
 # -------------------------
@@ -70,30 +119,22 @@ def check_root(predicate, root) -> bool:
     return root.i >= predicate.start and root.i <= predicate.end
 
 
-def get_predicates(doc) -> List[spacy.tokens.Span]:
+def get_predicates(doc, matcher: Optional[Matcher] = None) -> List[spacy.tokens.Span]:
     """
     Match verb phrases in the sentence using SpaCy Matcher patterns.
+    Pass a matcher from build_predicate_matcher to avoid recompiling the patterns.
     Returns a list of predicate spans.
     """
     root = get_root(doc)
-
-    patterns = [
-        [{"POS": "AUX"}, {"POS": "VERB"}, {"POS": "ADP"}],
-        [{"POS": "NOUN"}, {"POS": "VERB"}, {"POS": "ADP", "OP": "*"}],
-        [{"POS": "NOUN", "OP": "*"}, {"POS": "SCONJ"}, {"POS": "VERB"}, {"POS": "ADP"}, {"POS": "DET", "OP": "*"}],
-        [{"POS": "VERB"}, {"POS": "NOUN", "OP": "*"}, {"POS": "ADP", "OP": "*"}, {"POS": "DET", "OP": "*"}],
-        [{"POS": "SCONJ"}, {"POS": "VERB"}, {"POS": "ADP"}],
-        [{"POS": "ADV"}, {"POS": "VERB"}, {"POS": "PRON", "OP": "*"}],
-        [{"POS": "VERB", "OP": "?"}, {"POS": "ADV", "OP": "*"}, {"POS": "VERB", "OP": "+"}]
-    ]
-
-    matcher = Matcher(nlp.vocab)
-    matcher.add("VerbPhrase", patterns)
+    if matcher is None:
+        matcher = build_predicate_matcher(doc.vocab)
 
     matches = matcher(doc)
     spans = [doc[start:end] for _, start, end in matches]
 
     # Filter overlapping spans and check root presence
+    from spacy.util import filter_spans
+
     predicates = [span for span in filter_spans(spans) if check_root(span, root)]
     return predicates
 
@@ -123,7 +164,7 @@ baseline implementation
 '''
 def spo_baseline(line):
     verbs = {}
-    doc = nlp(line)
+    doc = get_nlp()(line)
     for token in doc:
         key=token.head.text;
         if(token.head.pos_ == "VERB" and key not in verbs.keys()):
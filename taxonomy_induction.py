@@ -1,110 +1,488 @@
+import hashlib
+import heapq
+import io
+import json
+import os
+import sqlite3
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from xml.sax.saxutils import quoteattr
+
 import networkx as nx
 
+import instrumentation
+
+SORT_CHUNK_BYTES = 64 * 1024 * 1024  # text held in memory per sorted run
+MAX_MERGE_FANIN = 256  # run files merged at once
+
+STORE_VERSION = 1  # bump when the hypernym store layout changes
+STORE_MMAP_BYTES = 1 << 40  # upper bound for SQLite's memory map of the store
+FINGERPRINT_SAMPLE_BYTES = 1024 * 1024  # bytes hashed at each end of the raw dump
+
+PNG_MAX_NODES = 2000  # larger graphs take Graphviz too long to lay out
 
-def clean_webIsALod(input_file: str, conf_threshold: float = 0.3) -> str:
+
+def _clean_line(line: str, conf_threshold: float) -> Optional[str]:
+    """
+    Parses one raw WebIsALOD line ("hyponym;hypernym\tconf...").
+    Returns the cleaned "hyponym\thypernym\tconf\n" line, or None if it is dropped.
+    """
+    comps = line.rstrip().split(";", 2)
+    if len(comps) < 2:
+        return None  # skip malformed lines
+    fields = comps[1].split("\t", 2)
+    if len(fields) < 2:
+        return None
+
+    try:
+        conf_value = float(fields[1])
+    except ValueError:
+        return None  # skip malformed lines
+    if conf_value <= conf_threshold:
+        return None
+
+    # Chained str.replace runs in C and beats str.translate/re.sub with a lookup here;
+    # the percent-escapes are only applied when the field contains a '%'.
+    hyponym = comps[0].replace("_", " ").replace("+", " ")
+    if "%" in hyponym:
+        hyponym = hyponym.replace("%2F", " ").replace("%3E", " ").replace("%27", "")\
+                         .replace("%3D", "").replace("%24", "").replace("%2B", " ")\
+                         .replace("%3C", "").replace("%5D", " ")
+    hyponym = hyponym.strip()
+    if not hyponym or hyponym[0] == "%":
+        return None
+
+    hypernym = fields[0].replace("_", " ").replace("+", " ")
+    if "%" in hypernym:
+        hypernym = hypernym.replace("%3D", "")
+    return f"{hyponym}\t{hypernym.strip()}\t{conf_value}\n"
+
+
+def _shard_offsets(input_file: str, shards: int) -> List[int]:
+    """Splits input_file into byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(input_file)
+    offsets = [0]
+    with open(input_file, "rb") as f:
+        for i in range(1, shards):
+            f.seek(size * i // shards)
+            f.readline()
+            offset = f.tell()
+            if offsets[-1] < offset < size:
+                offsets.append(offset)
+    offsets.append(size)
+    return offsets
+
+
+def _clean_shard(input_file: str, start: int, end: int, output_file: str, conf_threshold: float) -> str:
+    """Cleans the lines starting in the byte range [start, end) of input_file into output_file."""
+    with open(input_file, "rb") as fin, open(output_file, "w", encoding="utf8") as fout:
+        fin.seek(start)
+        pos = start
+        for raw in fin:
+            if pos >= end:
+                break
+            pos += len(raw)
+            text = raw.decode("utf8")
+            # Text mode also treats a lone '\r' as a line break
+            lines = io.StringIO(text, newline=None) if "\r" in text else (text,)
+            for line in lines:
+                cleaned = _clean_line(line, conf_threshold)
+                if cleaned:
+                    fout.write(cleaned)
+    return output_file
+
+
+def clean_webIsALod(input_file: str, conf_threshold: float = 0.3, sort_chunk_bytes: int = SORT_CHUNK_BYTES,
+                    workers: int = 1) -> str:
     """
     Cleans the WebIsALOD raw data.
     Keeps only lines with confidence > conf_threshold and hyponyms not starting with '%'.
+    With workers > 1 the input is split into line-aligned byte shards that are cleaned
+    in a process pool; the output is the same as with a single worker.
+    The cleaned lines are sorted with an external merge sort holding at most
+    sort_chunk_bytes of text in memory at a time.
     Returns the path to the final processed file.
     """
     output_file = "cleaned_data.txt"
     final_file = "processed_data.txt"
 
-    with open(input_file, "r", encoding="utf8") as f1, open(output_file, "w", encoding="utf8") as f2:
-        for line in f1:
-            comps = line.rstrip().rsplit(";")
-            hyponym = comps[0].replace("_"," ").replace("%2F"," ").replace("+"," ")\
-                               .replace("%3E"," ").replace("%27","").replace("%3D","")\
-                               .replace("%24","").replace("%2B"," ").replace("%3C","")\
-                               .replace("%5D"," ").strip()
-            hypernym = comps[1].rsplit("\t")[0].replace("_"," ").replace("+"," ").replace("%3D","").strip()
-            conf = comps[1].rsplit("\t")[1]
+    if workers <= 1:
+        with instrumentation.timer("taxonomy.clean"), \
+             open(input_file, "r", encoding="utf8") as f1, open(output_file, "w", encoding="utf8") as f2:
+            for line in f1:
+                cleaned = _clean_line(line, conf_threshold)
+                if cleaned:
+                    f2.write(cleaned)
+
+        # Sort the cleaned data
+        with instrumentation.timer("taxonomy.sort"):
+            external_sort(output_file, final_file, sort_chunk_bytes)
+        return final_file
+
+    offsets = _shard_offsets(input_file, workers)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(final_file))) as tmp_dir:
+        with instrumentation.timer("taxonomy.clean"), ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_clean_shard, input_file, start, end,
+                            os.path.join(tmp_dir, f"{output_file}.{i}"), conf_threshold)
+                for i, (start, end) in enumerate(zip(offsets, offsets[1:]))
+            ]
+            shard_files = [future.result() for future in futures]
+
+        # Sort and merge the cleaned shards
+        with instrumentation.timer("taxonomy.sort"):
+            external_sort(shard_files, final_file, sort_chunk_bytes)
+
+    return final_file
+
+
+def _write_run(lines: List[str], tmp_dir: str) -> str:
+    """Sorts lines and writes them to a new run file in tmp_dir."""
+    lines.sort()
+    fd, path = tempfile.mkstemp(suffix=".run", dir=tmp_dir)
+    with open(fd, "w", encoding="utf8") as fout:
+        fout.writelines(lines)
+    return path
+
+
+def _merge_runs(run_files: List[str], output_file: str):
+    """k-way merges sorted run files into output_file."""
+    with ExitStack() as stack:
+        runs = [stack.enter_context(open(path, "r", encoding="utf8")) for path in run_files]
+        with open(output_file, "w", encoding="utf8") as fout:
+            fout.writelines(heapq.merge(*runs))
 
+
+def external_sort(input_files: Union[str, List[str]], output_file: str, chunk_bytes: int = SORT_CHUNK_BYTES):
+    """
+    Sorts the lines of input_files (one path or a list of paths) into output_file with bounded memory.
+    Sorted chunks of about chunk_bytes are spilled to temporary run files which are
+    then k-way merged; the result is identical to sorted(f.readlines()).
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as tmp_dir:
+        if isinstance(input_files, str):
+            input_files = [input_files]
+
+        run_files = []
+        chunk, size = [], 0
+        for input_file in input_files:
+            with open(input_file, "r", encoding="utf8") as fin:
+                for line in fin:
+                    chunk.append(line)
+                    size += len(line)
+                    if size >= chunk_bytes:
+                        run_files.append(_write_run(chunk, tmp_dir))
+                        chunk, size = [], 0
+        if chunk or not run_files:
+            run_files.append(_write_run(chunk, tmp_dir))
+
+        # Merge in several passes if there are too many runs to keep open at once
+        while len(run_files) > MAX_MERGE_FANIN:
+            merged = []
+            for i in range(0, len(run_files), MAX_MERGE_FANIN):
+                group = run_files[i:i + MAX_MERGE_FANIN]
+                fd, path = tempfile.mkstemp(suffix=".run", dir=tmp_dir)
+                os.close(fd)
+                _merge_runs(group, path)
+                for run in group:
+                    os.remove(run)
+                merged.append(path)
+            run_files = merged
+
+        _merge_runs(run_files, output_file)
+
+
+def build_hypernym_index(processed_data: str, hyponyms: Optional[Iterable[str]] = None) -> Dict[str, Tuple[str, float]]:
+    """
+    Builds a hyponym -> (hypernym, confidence) index in a single pass over processed_data.
+    Only the highest-confidence hypernym is kept per hyponym (the first one on ties).
+    If hyponyms is given, only those hyponyms are indexed.
+    """
+    wanted = set(hyponyms) if hyponyms is not None else None
+    index = {}
+
+    with open(processed_data, "r", encoding="utf8") as fin:
+        for line in fin:
+            comps = line.rstrip().split("\t")
+            if len(comps) < 3:
+                continue
+            hyponym = comps[0].strip()
+            if wanted is not None and hyponym not in wanted:
+                continue
             try:
-                conf_value = float(conf)
+                conf_value = float(comps[2].strip())
             except ValueError:
-                continue  # skip malformed lines
+                continue
 
-            if conf_value > conf_threshold and hyponym and hyponym[0] != "%":
-                f2.write(f"{hyponym}\t{hypernym}\t{conf_value}\n")
+            best = index.get(hyponym)
+            if best is None or conf_value > best[1]:
+                index[hyponym] = (comps[1].strip(), conf_value)
 
-    # Sort the cleaned data
-    with open(output_file, "r", encoding="utf8") as f3, open(final_file, "w", encoding="utf8") as f4:
-        lines = sorted(f3.readlines())
-        for line in lines:
-            f4.write(line)
+    return index
 
-    return final_file
+
+_index_cache = {}
+
+
+def _cached_index(processed_data: str) -> Dict[str, Tuple[str, float]]:
+    """Returns the full index for processed_data, rebuilding it only when the file changes."""
+    stat = os.stat(processed_data)
+    key = (os.path.abspath(processed_data), stat.st_size, stat.st_mtime_ns)
+    if key not in _index_cache:
+        _index_cache.clear()
+        _index_cache[key] = build_hypernym_index(processed_data)
+    return _index_cache[key]
 
 
 def highest_confidence(req_hyponym: str, processed_data: str) -> str:
     """
     Returns the hypernym with the highest confidence value for a given hyponym.
     """
-    hyper = ""
-    max_conf = -1.0
+    best = _cached_index(processed_data).get(req_hyponym)
+    return best[0] if best else ""
 
+
+def highest_confidence_many(entities: Iterable[str], processed_data: str) -> Dict[str, str]:
+    """
+    Returns {entity: hypernym} for all entities with a single pass over processed_data.
+    Entities without a hypernym map to "".
+    """
+    entities = list(entities)
+    index = build_hypernym_index(processed_data, entities)
+    return {entity: index[entity][0] if entity in index else "" for entity in entities}
+
+
+def _source_fingerprint(source_file: str) -> str:
+    """
+    Fingerprint of the raw dump: size, mtime and a SHA-1 over its first and last
+    FINGERPRINT_SAMPLE_BYTES (hashing a multi-GB dump on every start would defeat the store).
+    """
+    stat = os.stat(source_file)
+    digest = hashlib.sha1()
+    with open(source_file, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if stat.st_size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(max(stat.st_size - FINGERPRINT_SAMPLE_BYTES, FINGERPRINT_SAMPLE_BYTES))
+            digest.update(f.read())
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+
+
+def _read_processed_pairs(processed_data: str) -> Iterator[Tuple[str, str, float]]:
+    """Yields (hyponym, hypernym, confidence) rows of processed_data in file order."""
     with open(processed_data, "r", encoding="utf8") as fin:
         for line in fin:
             comps = line.rstrip().split("\t")
-            hyponym, hypernym, conf = comps[0].strip(), comps[1].strip(), comps[2].strip()
+            if len(comps) < 3:
+                continue
             try:
-                conf_value = float(conf)
+                conf_value = float(comps[2].strip())
             except ValueError:
                 continue
+            yield comps[0].strip(), comps[1].strip(), conf_value
+
+
+class HypernymStore:
+    """
+    Persistent SQLite store of the cleaned WebIsALOD pairs.
+    The database is opened read-only and memory-mapped, so lookups only touch the
+    pages they need and several processes share the file through the page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size = {STORE_MMAP_BYTES}")
 
-            if hyponym == req_hyponym and conf_value > max_conf:
-                max_conf = conf_value
-                hyper = hypernym
+    @staticmethod
+    def read_meta(path: str) -> Dict[str, str]:
+        """Returns the metadata the store at path was built with, or {} if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return {}
+        try:
+            conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+            try:
+                return dict(conn.execute("SELECT key, value FROM meta"))
+            finally:
+                conn.close()
+        except sqlite3.DatabaseError:
+            return {}
+
+    @classmethod
+    def build(cls, processed_data: str, path: str, meta: Dict[str, str]) -> "HypernymStore":
+        """Loads processed_data into a new store at path, replacing any existing store atomically."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite", dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(tmp_path)
+            try:
+                conn.execute("PRAGMA journal_mode = OFF")
+                conn.execute("PRAGMA synchronous = OFF")
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.execute("CREATE TABLE pairs (hyponym TEXT, hypernym TEXT, conf REAL)")
+                # rowids follow the sorted file order, which breaks confidence ties like highest_confidence
+                conn.executemany("INSERT INTO pairs VALUES (?, ?, ?)", _read_processed_pairs(processed_data))
+                conn.execute("CREATE INDEX pairs_hyponym ON pairs (hyponym, conf DESC)")
+                conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+                conn.commit()
+            finally:
+                conn.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return cls(path)
 
-    return hyper
+    def highest_confidence(self, req_hyponym: str) -> str:
+        """Returns the hypernym with the highest confidence value for a given hyponym, or ""."""
+        row = self.conn.execute(
+            "SELECT hypernym FROM pairs WHERE hyponym = ? ORDER BY conf DESC, rowid LIMIT 1", (req_hyponym,)
+        ).fetchone()
+        return row[0] if row else ""
 
+    def highest_confidence_many(self, entities: Iterable[str]) -> Dict[str, str]:
+        """Returns {entity: hypernym} for all entities; entities without a hypernym map to ""."""
+        return {entity: self.highest_confidence(entity) for entity in entities}
 
-def taxonomy_induction(input_file: str, processed_data: str):
+    def close(self):
+        self.conn.close()
+
+
+def open_hypernym_store(input_file: str, conf_threshold: float = 0.3, store_file: str = "processed_data.sqlite",
+                        **clean_kwargs) -> HypernymStore:
     """
-    Build a taxonomy graph using the highest confidence hypernym relations.
-    Saves the graph as 'taxonomy.png'.
+    Opens the hypernym store for the raw dump input_file, running clean_webIsALod and
+    rebuilding the store only if the dump or conf_threshold changed since it was built.
+    Extra keyword arguments are passed to clean_webIsALod.
     """
-    with open(input_file, "r", encoding="utf8") as fin:
-        entities = [line.strip() for line in fin if line.strip()]
+    meta = {
+        "version": str(STORE_VERSION),
+        "source": _source_fingerprint(input_file),
+        "conf_threshold": repr(float(conf_threshold)),
+    }
+    if HypernymStore.read_meta(store_file) == meta:
+        return HypernymStore(store_file)
 
-    G = nx.DiGraph()
-    ROOT_NODE = "ROOT_ENTITY"
-
-    # First pass: add all entities and their highest-confidence hypernym
-    new_entities = entities.copy()
-    for entity in new_entities:
-        G.add_node(entity)
-        hyper = highest_confidence(entity, processed_data)
-        if not hyper:  # no hypernym found
-            G.add_edge(entity, ROOT_NODE)
+    processed_data = clean_webIsALod(input_file, conf_threshold, **clean_kwargs)
+    return HypernymStore.build(processed_data, store_file, meta)
+
+
+ROOT_NODE = "ROOT_ENTITY"
+
+
+def build_taxonomy(entities: List[str], hypernyms: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """
+    Builds the taxonomy as a {node: parent} map in insertion order.
+    Every node has exactly one parent: its highest-confidence hypernym, or ROOT_NODE
+    for leaves, self-loops and hypernyms that are not entities themselves.
+    ROOT_NODE itself maps to None.
+    """
+    parents = {}
+    for entity in entities:
+        hyper = hypernyms.get(entity, "")
+        if hyper and hyper != entity:
+            parents[entity] = hyper
+            parents.setdefault(hyper, ROOT_NODE)
         else:
-            G.add_edge(entity, hyper)
-            if hyper not in G.nodes:
-                G.add_node(hyper)
+            parents[entity] = ROOT_NODE
+    if parents:
+        parents.setdefault(ROOT_NODE, None)
+    return parents
+
+
+def _edges(parents: Dict[str, Optional[str]]) -> Iterator[Tuple[str, str]]:
+    return ((node, parent) for node, parent in parents.items() if parent is not None)
+
 
-    # Remove self-loops
-    G.remove_edges_from(nx.selfloop_edges(G))
+def write_edge_list(parents: Dict[str, Optional[str]], output_file: str):
+    """Writes one "child\tparent" line per edge."""
+    with open(output_file, "w", encoding="utf8") as fout:
+        for node, parent in _edges(parents):
+            fout.write(f"{node}\t{parent}\n")
 
-    # Ensure all leaves point to root if disconnected
-    for node in G.nodes:
-        if len(list(G.successors(node))) == 0 and node != ROOT_NODE:
-            G.add_edge(node, ROOT_NODE)
 
-    # Save graph as PNG
+def write_graphml(parents: Dict[str, Optional[str]], output_file: str):
+    """Streams the taxonomy as a directed GraphML document."""
+    with open(output_file, "w", encoding="utf8") as fout:
+        fout.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                   '<graph edgedefault="directed">\n')
+        for node in parents:
+            fout.write(f"<node id={quoteattr(node)}/>\n")
+        for node, parent in _edges(parents):
+            fout.write(f"<edge source={quoteattr(node)} target={quoteattr(parent)}/>\n")
+        fout.write("</graph>\n</graphml>\n")
+
+
+def write_json_adjacency(parents: Dict[str, Optional[str]], output_file: str):
+    """Streams the taxonomy in the node-link adjacency format read by nx.adjacency_graph."""
+    with open(output_file, "w", encoding="utf8") as fout:
+        fout.write('{"directed": true, "multigraph": false, "graph": {}, "nodes": [')
+        fout.write(", ".join(json.dumps({"id": node}) for node in parents))
+        fout.write('], "adjacency": [')
+        fout.write(", ".join(json.dumps([{"id": parent}] if parent is not None else []) for parent in parents.values()))
+        fout.write("]}\n")
+
+
+def write_png(parents: Dict[str, Optional[str]], output_file: str, max_nodes: int = PNG_MAX_NODES):
+    """Renders the taxonomy with Graphviz; refuses graphs with more than max_nodes nodes."""
+    if len(parents) > max_nodes:
+        raise ValueError(f"Refusing to render {len(parents)} nodes as PNG (limit {max_nodes}); "
+                         f"use one of the formats {sorted(set(GRAPH_WRITERS) - {'png'})}")
+    G = nx.DiGraph()
+    G.add_nodes_from(parents)
+    G.add_edges_from(_edges(parents))
     p = nx.drawing.nx_pydot.to_pydot(G)
-    p.write_png("taxonomy.png")
-    print(f"Taxonomy graph saved as 'taxonomy.png' with {len(G.nodes)} nodes and {len(G.edges)} edges.")
+    p.write_png(output_file)
+
+
+GRAPH_WRITERS = {
+    "tsv": write_edge_list,
+    "graphml": write_graphml,
+    "json": write_json_adjacency,
+    "png": write_png,
+}
+
+
+def taxonomy_induction(input_file: str, processed_data: Union[str, HypernymStore],
+                       output_file: str = "taxonomy.tsv", output_format: Optional[str] = None):
+    """
+    Build a taxonomy graph using the highest confidence hypernym relations.
+    processed_data is either the processed data file or an open HypernymStore.
+    Saves the graph to output_file in output_format (one of GRAPH_WRITERS), which
+    defaults to the file extension. PNG rendering is only done when asked for.
+    """
+    output_format = output_format or os.path.splitext(output_file)[1].lstrip(".").lower()
+    if output_format not in GRAPH_WRITERS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {sorted(GRAPH_WRITERS)}")
+
+    with open(input_file, "r", encoding="utf8") as fin:
+        entities = [line.strip() for line in fin if line.strip()]
+    instrumentation.count("taxonomy.entities", len(entities))
+
+    with instrumentation.timer("taxonomy.lookup"):
+        if isinstance(processed_data, HypernymStore):
+            hypernyms = processed_data.highest_confidence_many(entities)
+        else:
+            hypernyms = highest_confidence_many(entities, processed_data)
+
+    with instrumentation.timer("taxonomy.build"):
+        parents = build_taxonomy(entities, hypernyms)
+    with instrumentation.timer("taxonomy.write"):
+        GRAPH_WRITERS[output_format](parents, output_file)
+    num_edges = sum(parent is not None for parent in parents.values())
+    print(f"Taxonomy graph saved as '{output_file}' with {len(parents)} nodes and {num_edges} edges.")
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        raise ValueError("Expected exactly 1 argument: input file")
+    if len(sys.argv) not in (2, 3):
+        raise ValueError("Expected 1 or 2 arguments: input file and optional output file (.tsv, .graphml, .json, .png)")
 
     input_file = sys.argv[1]
-    processed_data_file = clean_webIsALod("webisalod-pairs.txt")
-    taxonomy_induction(input_file, processed_data_file)
+    store = open_hypernym_store("webisalod-pairs.txt")
+    taxonomy_induction(input_file, store, *sys.argv[2:])
 
 # References:
 # https://networkx.org/documentation/stable/tutorial.html
@@ -0,0 +1,96 @@
+"""
+Local HTTP server serving LSF-shaped pages for the web_scraping tests:
+
+    /main          portal page linking to the course listing ("Alle Lehrveranstaltungen")
+    /courses       listing table with one link per course
+    /course/<i>    course page with the two detail tables
+
+Courses in FAILING_COURSES answer 500, courses in MISSING_COURSES 404.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NUM_COURSES = 12
+FAILING_COURSES = {3}
+MISSING_COURSES = {8}
+
+PAGE = '<html><head><meta charset="utf-8"><title>LSF</title></head><body>{}</body></html>'
+
+
+def course_details(i):
+    """The (header, value) rows of course i's basic data table; some columns only appear on some courses."""
+    rows = [("Type of Course", "Lecture"), ("Number", str(1000 + i)), ("Hours per week", f"{i % 4 + 1}")]
+    if i % 3 == 1:
+        rows.append(("Language", "English  and\n German"))
+    if i % 5 == 2:
+        rows.append(("Max. participants", str(20 + i)))
+    return rows
+
+
+def course_instructors(i):
+    return [f"Prof. Dr. Teacher {i}", f"Dr. Assistant {i}"] if i % 2 else [f"Prof. Dr. Teacher {i}"]
+
+
+def main_page(base):
+    return PAGE.format(
+        '<div class="content_max_portal_qis">'
+        f'<a class="ueb" href="{base}/search">Suche</a>'
+        f'<a class="ueb" href="{base}/courses">Alle Lehrveranstaltungen</a>'
+        '</div>'
+    )
+
+
+def listing_page(base):
+    rows = "".join(f'<tr><td><a class="regular" href="{base}/course/{i}"> Course {i} </a></td></tr>'
+                   for i in range(NUM_COURSES))
+    return PAGE.format(f'<table summary="Übersicht über alle Veranstaltungen">{rows}</table>')
+
+
+def course_page(i):
+    details = "".join(f"<tr><th>{header}</th><td>{value}</td></tr>" for header, value in course_details(i))
+    instructors = "".join(f'<tr><td class="{"mod_n_odd" if k % 2 == 0 else "mod_n_even"}">{name}</td></tr>'
+                          for k, name in enumerate(course_instructors(i)))
+    return PAGE.format(
+        '<div id="navigation"><table summary="Navigation"><tr><td>Menu</td></tr></table></div>'
+        f'<table summary="Grunddaten zur Veranstaltung">{details}</table>'
+        f'<table summary="Verantwortliche Dozenten"><tr><th class="mod">Responsible Instructors</th></tr>'
+        f'{instructors}</table>'
+    )
+
+
+class LSFHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        status, body = 200, None
+        if self.path == "/main":
+            body = main_page(base)
+        elif self.path == "/courses":
+            body = listing_page(base)
+        elif self.path.startswith("/course/"):
+            i = int(self.path.rsplit("/", 1)[1])
+            if i in FAILING_COURSES:
+                status, body = 500, "Internal Server Error"
+            elif i in MISSING_COURSES or i >= NUM_COURSES:
+                status, body = 404, "Not Found"
+            else:
+                body = course_page(i)
+        else:
+            status, body = 404, "Not Found"
+
+        data = body.encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve():
+    """Starts the server on a free local port in a daemon thread; call shutdown() and server_close() when done."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LSFHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,31 @@
+import json
+import os
+import re
+
+import pytest
+
+from NER_POS_Tagging import clean_text, strip_templates
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "clean_text_golden.json")
+
+with open(GOLDEN_FILE, encoding="utf8") as f:
+    GOLDEN = json.load(f)
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=[case["name"] for case in GOLDEN])
+def test_clean_text_golden(case):
+    # Expected outputs were produced by the BeautifulSoup + re.sub cleaner clean_text replaced
+    assert clean_text(case["input"]) == case["expected"]
+
+
+@pytest.mark.parametrize("text", [
+    "no braces",
+    "a {x} b {y} c",
+    "a {x\n} b",
+    "{a}\n{b}",
+    "a { b",
+    "a } b { c } d",
+    "{{{}}}{",
+])
+def test_strip_templates_matches_greedy_regex(text):
+    assert strip_templates(text) == re.sub(r"\{.*\}", "", text)
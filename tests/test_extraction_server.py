@@ -0,0 +1,78 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+import extraction_server
+
+
+def tokens(doc, _):
+    return [token.text for token in doc]
+
+
+@pytest.fixture
+def server():
+    # The typing endpoint, backed by a blank pipeline that returns the tokens of each text
+    service = extraction_server.ExtractionService(endpoints=())
+    service.batchers["typing"] = extraction_server.MicroBatcher(spacy.blank("en"), tokens, max_wait=0.05)
+    server = extraction_server.make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def url(server, path):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+def request(server, path, body=None):
+    """(status, decoded JSON) of a GET, or of a POST when body (bytes) is given."""
+    try:
+        with urllib.request.urlopen(url(server, path), data=body, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def post(server, path, payload):
+    return request(server, path, json.dumps(payload).encode("utf8"))
+
+
+def test_concurrent_requests_are_batched_in_order(server):
+    requests = [[f"text {i} part {j}" for j in range(5)] for i in range(8)]
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        responses = list(pool.map(lambda sentences: post(server, "/typing", {"sentences": sentences}), requests))
+
+    for sentences, (status, body) in zip(requests, responses):
+        assert status == 200
+        assert body["types"] == [sentence.split() for sentence in sentences]
+
+    status, health = request(server, "/health")
+    assert status == 200
+    assert health["endpoints"] == ["typing"]
+    assert health["texts"]["typing"] == 40
+    assert health["batches"]["typing"] < 40
+
+
+def test_invalid_requests(server):
+    assert request(server, "/typing", b"not json")[0] == 400
+    assert post(server, "/typing", {"sentences": ["fine", 3]})[0] == 400
+    assert post(server, "/typing", ["not", "an", "object"])[0] == 400
+    assert post(server, "/unknown", {"sentences": []})[0] == 404
+    assert request(server, "/unknown")[0] == 404
+
+
+def test_close_stops_the_worker():
+    batcher = extraction_server.MicroBatcher(spacy.blank("en"), tokens)
+    assert batcher.submit(["a b", "c"]) == [["a", "b"], ["c"]]
+    batcher.close()
+    assert not batcher._worker.is_alive()
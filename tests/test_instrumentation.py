@@ -0,0 +1,33 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+import instrumentation
+
+
+@pytest.fixture
+def nlp():
+    instrumentation.reset()
+    instrumentation.enable(component_timing=True)
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    yield instrumentation.instrument_pipeline(nlp)
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_components_are_timed_while_enabled(nlp):
+    nlp("One sentence. Another one.")
+    list(nlp.pipe(["A text.", "Another text."]))
+    timers = instrumentation.summary()["timers"]
+    assert timers["spacy.tokenizer"]["calls"] == 3
+    assert timers["spacy.sentencizer"]["calls"] == 3
+
+
+def test_disable_stops_component_timing(nlp):
+    instrumentation.disable()
+    doc = nlp("One sentence. Another one.")
+    docs = list(nlp.pipe(["A text.", "Another text."]))
+    assert len(list(doc.sents)) == 2
+    assert [len(list(doc.sents)) for doc in docs] == [1, 1]
+    assert instrumentation.summary()["timers"] == {}
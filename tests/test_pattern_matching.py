@@ -0,0 +1,31 @@
+from collections import Counter
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+from spacy.tokens import Doc
+
+import pattern_matching
+
+
+def tagged_doc(vocab):
+    # "cats eat mice" with the POS tags and lemmas the diet patterns look at
+    return Doc(vocab, words=["cats", "eat", "mice"], pos=["NOUN", "VERB", "NOUN"], lemmas=["cat", "eat", "mouse"])
+
+
+def diets_for(animals):
+    vocab = spacy.blank("en").vocab
+    matcher = pattern_matching.DietMatcher(vocab, animals)
+    diets = {animal: Counter() for animal in matcher.animals}
+    matcher.update(tagged_doc(vocab), diets)
+    return diets
+
+
+def test_repeated_animals_count_once():
+    assert diets_for(["cat", "cat"]) == diets_for(["cat"])
+    assert diets_for(["cat"])["cat"] == Counter({"cats eat mice": 1, "eat mice": 1})
+
+
+def test_animals_keep_their_first_order():
+    matcher = pattern_matching.DietMatcher(spacy.blank("en").vocab, ["dog", "cat", "dog"])
+    assert matcher.animals == ["dog", "cat"]
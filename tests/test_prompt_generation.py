@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+import prompt_generation
+
+FULL_RELATION = "PersonLanguage"
+CANDIDATE_RELATION = "CountryBordersWithCountry"
+RELATIONS = {FULL_RELATION, CANDIDATE_RELATION}
+
+
+def full_output():
+    return pd.DataFrame({
+        "Prompt": ["Ada speaks [MASK]."] * 3,
+        "SubjectEntity": ["Ada"] * 3,
+        "Relation": FULL_RELATION,
+        "ObjectEntity": ["English", "French", "German"],
+        "Probability": [0.8123, 0.1049, 0.0311],
+    })
+
+
+def candidate_output():
+    # Candidate scores come out of torch as float32
+    return pd.DataFrame({
+        "SubjectEntity": ["France", "France", "Spain", "Spain"],
+        "Relation": CANDIDATE_RELATION,
+        "ObjectEntity": ["Spain", "Italy", "France", "Portugal"],
+        "Probability": np.array([0.7123, 0.3457, 0.0821, 0.0417], dtype=np.float32),
+    })
+
+
+def filtered_csvs(tmp_path, candidate_format):
+    input_dir, output_dir = tmp_path / candidate_format, tmp_path / f"{candidate_format}_filtered"
+    prompt_generation.save_probe_output(full_output(), input_dir, FULL_RELATION)
+    prompt_generation.save_probe_output(candidate_output(), input_dir, CANDIDATE_RELATION, candidate_format)
+    prompt_generation.filter_by_probability(input_dir, [0.5, 0.1], RELATIONS, output_dir)
+    return {relation: (output_dir / f"{relation}.csv").read_text() for relation in RELATIONS}
+
+
+def test_parquet_candidates_export_like_csv(tmp_path):
+    csv_output, parquet_output = filtered_csvs(tmp_path, "csv"), filtered_csvs(tmp_path, "parquet")
+    assert parquet_output == csv_output
+    assert "0.7123" in parquet_output[CANDIDATE_RELATION]
+    assert "0.7123000" not in parquet_output[CANDIDATE_RELATION]
+
+
+def test_each_relation_keeps_its_columns(tmp_path):
+    output = filtered_csvs(tmp_path, "parquet")
+    assert output[FULL_RELATION].splitlines()[0] == "Prompt,SubjectEntity,Relation,ObjectEntity,Probability"
+    assert output[CANDIDATE_RELATION].splitlines()[0] == "SubjectEntity,Relation,ObjectEntity,Probability"
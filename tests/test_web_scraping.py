@@ -0,0 +1,67 @@
+import csv
+
+import pytest
+
+import web_scraping
+from lsf_fixture import (FAILING_COURSES, MISSING_COURSES, NUM_COURSES, course_details, course_instructors,
+                         serve)
+
+
+@pytest.fixture
+def lsf_url():
+    server = serve()
+    yield f"http://127.0.0.1:{server.server_port}/main"
+    server.shutdown()
+    server.server_close()
+
+
+def scrape(lsf_url, tmp_path, max_workers):
+    output_file = tmp_path / "courses.csv"
+    session = web_scraping.make_session(pool_size=max_workers, retries=0)
+    web_scraping.problem_2_3(str(output_file), max_workers=max_workers, requests_per_second=0,
+                             base_url=lsf_url, session=session)
+    with open(output_file, newline="", encoding="utf8") as f:
+        reader = csv.reader(f)
+        return next(reader), list(reader)
+
+
+def test_problem_2_1_lists_courses(lsf_url):
+    courses = web_scraping.problem_2_1(lsf_url)
+    assert [course["Name of Course"] for course in courses] == [f"Course {i}" for i in range(NUM_COURSES)]
+    assert all(course["URL"].endswith(f"/course/{i}") for i, course in enumerate(courses))
+
+
+def test_problem_2_2_parses_course_page(lsf_url):
+    url = lsf_url.replace("/main", "/course/1")
+    details = web_scraping.problem_2_2(url)
+    assert details == {
+        "Type of Course": "Lecture",
+        "Number": "1001",
+        "Hours per week": "2",
+        "Language": "English and German",
+        "Responsible Instructors": course_instructors(1),
+    }
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_problem_2_3_rows_in_course_order(lsf_url, tmp_path, max_workers):
+    header, rows = scrape(lsf_url, tmp_path, max_workers)
+
+    expected = [i for i in range(NUM_COURSES) if i not in FAILING_COURSES | MISSING_COURSES]
+    assert [row[header.index("Name of Course")] for row in rows] == [f"Course {i}" for i in expected]
+    assert [row[header.index("Number")] for row in rows] == [str(1000 + i) for i in expected]
+
+
+def test_problem_2_3_header_is_union_of_columns(lsf_url, tmp_path):
+    header, rows = scrape(lsf_url, tmp_path, max_workers=4)
+
+    # First-seen order: course 0 has the base columns, 1 adds Language, 2 adds Max. participants
+    assert header == ["Name of Course", "URL", "Type of Course", "Number", "Hours per week",
+                      "Responsible Instructors", "Language", "Max. participants"]
+    for row in rows:
+        i = int(row[header.index("Name of Course")].split()[-1])
+        values = dict(zip(header, row))
+        for column, value in course_details(i):
+            assert values[column] == " ".join(value.split())
+        missing = {"Language", "Max. participants"} - {column for column, _ in course_details(i)}
+        assert all(values[column] == "" for column in missing)
@@ -1,9 +1,21 @@
 import csv
+import hashlib
+import json
+import os
 import requests
 import bs4
 import re
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pprint
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 BASE_HIMYM_URL = "https://how-i-met-your-mother.fandom.com/wiki/"
@@ -13,6 +25,163 @@ BASE_LSF_URL = (
     "&P.vx=kurz&lang=en&noDBAction=y&init=y&lang=en"
 )
 
+# Only the tables the extractors read; parsing just these skips building the rest of the page
+INFOBOX_STRAINER = bs4.SoupStrainer("table", attrs={"class": "infobox character"})
+COURSE_STRAINER = bs4.SoupStrainer(
+    "table", attrs={"summary": ["Grunddaten zur Veranstaltung", "Verantwortliche Dozenten"]}
+)
+
+
+def make_session(pool_size: int = 8, retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Session with a connection pool of pool_size per host, so concurrent requests reuse
+    TCP/TLS connections, and retries with exponential backoff on connection errors and
+    429/5xx responses.
+    """
+    retry = Retry(total=retries, backoff_factor=backoff_factor,
+                  status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Thread-safe limiter allowing at most requests_per_second requests per host."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Request headers that select a different representation of the same URL
+CACHE_KEY_HEADERS = {"accept-language", "accept"}
+
+class ResponseCache:
+    """
+    On-disk cache of GET responses keyed by URL and the request headers that change the
+    content (CACHE_KEY_HEADERS). Entries younger than ttl seconds are served directly;
+    older ones are revalidated with If-None-Match/If-Modified-Since. In offline mode only
+    cached entries are served and nothing touches the network.
+    """
+
+    def __init__(self, directory: str = ".http_cache", ttl: float = 24 * 3600, offline: bool = False):
+        self.directory = directory
+        self.ttl = ttl
+        self.offline = offline
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str, headers: Dict[str, str]) -> str:
+        relevant = sorted((k.lower(), v) for k, v in headers.items() if k.lower() in CACHE_KEY_HEADERS)
+        key = hashlib.sha256(json.dumps([url, relevant]).encode("utf8")).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def _load(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path + ".json", "r", encoding="utf8") as f:
+                meta = json.load(f)
+            with open(path + ".body", "rb") as f:
+                meta["body"] = f.read()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path: str, meta: Dict, body: bytes):
+        # Write to temporary files and rename, so concurrent readers never see partial entries
+        for suffix, data in ((".body", body), (".json", json.dumps(meta).encode("utf8"))):
+            tmp = f"{path}{suffix}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path + suffix)
+
+    @staticmethod
+    def _response(url: str, entry: Dict) -> requests.Response:
+        res = requests.Response()
+        res.status_code = 200
+        res.url = url
+        res._content = entry["body"]
+        res.encoding = entry.get("encoding")
+        res.headers.update(entry.get("headers", {}))
+        return res
+
+    def get(self, url: str, session=None, rate_limiter: Optional[RateLimiter] = None, **kwargs) -> requests.Response:
+        headers = dict(kwargs.pop("headers", None) or {})
+        path = self._path(url, headers)
+        entry = self._load(path)
+
+        if self.offline:
+            if entry is None:
+                raise requests.ConnectionError(f"Offline mode: {url} is not cached")
+            return self._response(url, entry)
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            return self._response(url, entry)
+
+        if entry is not None:
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        if rate_limiter:
+            rate_limiter.wait(url)
+        res = (session or requests).get(url, headers=headers, **kwargs)
+
+        if res.status_code == 304 and entry is not None:
+            entry["fetched_at"] = time.time()
+            body = entry.pop("body")
+            self._store(path, entry, body)
+            entry["body"] = body
+            return self._response(url, entry)
+
+        res.raise_for_status()
+        meta = {
+            "url": url,
+            "fetched_at": time.time(),
+            "encoding": res.encoding,
+            "headers": {k: res.headers[k] for k in ("Content-Type", "ETag", "Last-Modified") if k in res.headers},
+        }
+        self._store(path, meta, res.content)
+        return res
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def enable_cache(directory: str = ".http_cache", ttl: float = 24 * 3600, offline: bool = False) -> ResponseCache:
+    """Route every scraper request through an on-disk ResponseCache."""
+    global _response_cache
+    _response_cache = ResponseCache(directory, ttl, offline)
+    return _response_cache
+
+
+def disable_cache():
+    global _response_cache
+    _response_cache = None
+
+
+def _get(url: str, session: Optional[requests.Session] = None, rate_limiter: Optional[RateLimiter] = None,
+         **kwargs) -> requests.Response:
+    """GET url through the response cache if enabled, else through session (or plain requests)."""
+    if _response_cache is not None:
+        return _response_cache.get(url, session, rate_limiter, **kwargs)
+    if rate_limiter:
+        rate_limiter.wait(url)
+    res = (session or requests).get(url, **kwargs)
+    res.raise_for_status()
+    return res
+
 
 def problem_1(name: str) -> List[Dict[str, Union[str, List[str]]]]:
     """Extract character attributes from HIMYM wiki."""
@@ -20,13 +189,17 @@ def problem_1(name: str) -> List[Dict[str, Union[str, List[str]]]]:
     url = BASE_HIMYM_URL + name_link
 
     try:
-        res = requests.get(url)
-        res.raise_for_status()
+        res = _get(url)
     except requests.RequestException:
         print(f"Error fetching URL: {url}")
         return []
 
-    soup = bs4.BeautifulSoup(res.text, "lxml")
+    return parse_character_infobox(res.text)
+
+
+def parse_character_infobox(html: str, partial: bool = True) -> List[Dict[str, Union[str, List[str]]]]:
+    """Extract the attributes of a HIMYM character page; partial parses only the infobox table."""
+    soup = bs4.BeautifulSoup(html, "lxml", parse_only=INFOBOX_STRAINER if partial else None)
     infobox = soup.find("table", {"class": "infobox character"})
     if not infobox:
         return []
@@ -44,11 +217,10 @@ def problem_1(name: str) -> List[Dict[str, Union[str, List[str]]]]:
     return info_list
 
 
-def problem_2_1() -> List[Dict[str, str]]:
+def problem_2_1(base_url: str = BASE_LSF_URL, session: Optional[requests.Session] = None) -> List[Dict[str, str]]:
     """Get all courses and their URLs from LSF portal."""
     try:
-        res = requests.get(BASE_LSF_URL, headers={"Accept-Language": "en-US,en;q=0.9"})
-        res.raise_for_status()
+        res = _get(base_url, session, headers={"Accept-Language": "en-US,en;q=0.9"})
     except requests.RequestException:
         print("Error fetching LSF main page.")
         return []
@@ -69,8 +241,7 @@ def problem_2_1() -> List[Dict[str, str]]:
         return []
 
     try:
-        res_courses = requests.get(courses_url)
-        res_courses.raise_for_status()
+        res_courses = _get(courses_url, session)
     except requests.RequestException:
         print(f"Error fetching courses page: {courses_url}")
         return []
@@ -88,16 +259,21 @@ def problem_2_1() -> List[Dict[str, str]]:
     return course_list
 
 
-def problem_2_2(url: str) -> Dict[str, Union[str, List[str]]]:
+def problem_2_2(url: str, session: Optional[requests.Session] = None,
+                rate_limiter: Optional[RateLimiter] = None) -> Dict[str, Union[str, List[str]]]:
     """Extract course details from a course URL."""
     try:
-        res = requests.get(url, headers={"Accept-Language": "en-US,en;q=0.9"})
-        res.raise_for_status()
+        res = _get(url, session, rate_limiter, headers={"Accept-Language": "en-US,en;q=0.9"})
     except requests.RequestException:
         print(f"Error fetching course page: {url}")
         return {}
 
-    soup = bs4.BeautifulSoup(res.text, "lxml")
+    return parse_course_details(res.text)
+
+
+def parse_course_details(html: str, partial: bool = True) -> Dict[str, Union[str, List[str]]]:
+    """Extract the details of an LSF course page; partial parses only the two detail tables."""
+    soup = bs4.BeautifulSoup(html, "lxml", parse_only=COURSE_STRAINER if partial else None)
     info_table = soup.find("table", {"summary": "Grunddaten zur Veranstaltung"})
     instructor_table = soup.find("table", {"summary": "Verantwortliche Dozenten"})
 
@@ -129,37 +305,70 @@ def problem_2_2(url: str) -> Dict[str, Union[str, List[str]]]:
     return data
 
 
-def problem_2_3(output_file: str = "file.csv") -> None:
-    """Scrape all courses and their details, save to CSV."""
-    courses = problem_2_1()
+def _scrape_in_order(courses: List[Dict[str, str]], fetch, max_workers: int):
+    """
+    Yields (course, details) in course order while at most max_workers * 4 pages are in
+    flight, so finished but not yet written results cannot pile up.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for course in courses:
+            pending.append((course, pool.submit(fetch, course)))
+            if len(pending) >= max_workers * 4:
+                course, future = pending.popleft()
+                yield course, future.result()
+        while pending:
+            course, future = pending.popleft()
+            yield course, future.result()
+
+
+def problem_2_3(output_file: str = "file.csv", max_workers: int = 8, requests_per_second: float = 5.0,
+                base_url: str = BASE_LSF_URL, session: Optional[requests.Session] = None) -> None:
+    """
+    Scrape all courses and their details, save to CSV.
+    Course pages are fetched by max_workers threads sharing one pooled session, at most
+    requests_per_second per host; rows keep the order of the problem_2_1 course list.
+    Each row is spilled to a temporary JSON-lines file as soon as it is scraped, so memory
+    stays flat; the CSV is written from it at the end with the columns in first-seen order.
+    """
+    session = session or make_session(pool_size=max_workers)
+    courses = problem_2_1(base_url, session)
     if not courses:
         print("No courses found.")
         return
 
-    # Determine full headers
-    headers = set()
-    course_details_list = []
-
-    for course in courses:
-        url = course.get("URL")
-        if not url:
-            continue
-        details = problem_2_2(url)
-        if not details:
-            continue
-        course_data = {**course, **details}
-        course_details_list.append(course_data)
-        headers.update(course_data.keys())
-
-    headers = list(headers)
-    with open(output_file, "w", newline="", encoding="utf8") as f:
-        writer = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore")
-        writer.writeheader()
-        for course_data in course_details_list:
-            writer.writerow(course_data)
+    rate_limiter = RateLimiter(requests_per_second)
+    courses = [course for course in courses if course.get("URL")]
+
+    def fetch(course):
+        return problem_2_2(course["URL"], session, rate_limiter)
+
+    # Union of all row keys in first-seen order
+    headers = {}
+
+    with tempfile.TemporaryFile("w+", encoding="utf8") as spill:
+        for course, details in _scrape_in_order(courses, fetch, max_workers):
+            if not details:
+                continue
+            course_data = {**course, **details}
+            headers.update(dict.fromkeys(course_data))
+            spill.write(json.dumps(course_data) + "\n")
+
+        spill.seek(0)
+        with open(output_file, "w", newline="", encoding="utf8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(headers), extrasaction="ignore")
+            writer.writeheader()
+            for line in spill:
+                writer.writerow(json.loads(line))
 
 
 def main():
+    # SCRAPER_CACHE_DIR enables the response cache; SCRAPER_OFFLINE=1 replays it without network access
+    if os.environ.get("SCRAPER_CACHE_DIR") or os.environ.get("SCRAPER_OFFLINE") == "1":
+        enable_cache(os.environ.get("SCRAPER_CACHE_DIR", ".http_cache"),
+                     float(os.environ.get("SCRAPER_CACHE_TTL", 24 * 3600)),
+                     os.environ.get("SCRAPER_OFFLINE") == "1")
+
     print("Example: HIMYM character attributes")
     pprint(problem_1("Lily Aldrin"))
 